@@ -0,0 +1,189 @@
+# aggregate.py
+# Aggregation engine: only base fact tables are stored on disk, and every rollup
+# the case studies show is derived from them with one vectorized groupby. Each
+# view is memoized on the versions of the facts it reads, so appending a quarter
+# to a fact refreshes exactly the views built from it. While the SQL backend
+# (query.py) serves a fact, its views are summed by the database instead and
+# the fact's rows are never loaded into the app process.
+#
+# Base facts                        Views derived here
+# quarterly_state_transaction    -> transaction_by_state
+# quarterly_registrations        -> state_registrations
+# insurance_trend_by_state       -> insurance_by_state
+# district_insurance_transactions -> insurance_by_district
+# district_user_summary          -> district_registrations
+# transactions_by_state_category -> category_matrix
+# state_users_by_device          -> device_users_by_state, brand_matrix
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data
+import dims
+import query
+
+
+# ------------------ Incremental rollups ------------------
+# A fact is stored as a base file plus appended quarter partitions (data.parts).
+# Each part's partial rollup is cached on that part's (file, mtime), so a new
+# quarter costs one groupby over the new rows plus a combine over the groups.
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _partial(name, part, dims_version, keys, metrics):
+    return data.load_part(name, part).groupby(list(keys), sort=False)[list(metrics)].sum()
+
+
+# Sum `metrics` over `keys` for fact `name`.
+def rollup(name, keys, metrics):
+    dims_version = data.dims_version(name)
+    partials = [_partial(name, part, dims_version, tuple(keys), tuple(metrics)) for part in data.parts(name)]
+    if len(partials) == 1:
+        combined = partials[0]
+    else:
+        combined = pd.concat(partials).groupby(level=list(range(len(keys)))).sum()
+    return combined.sort_index().reset_index()
+
+
+# Sum `metrics` over `keys` for fact `name`: by the SQL backend when it serves
+# `name`, so the fact's rows are never loaded, otherwise by rollup().
+def _sums(name, keys, metrics):
+    if query.available(name):
+        return query.sums(name, keys, metrics)
+    return rollup(name, keys, metrics)
+
+
+def _by_state(name, metrics):
+    totals = _sums(name, ["state_id"], metrics)
+    return totals.assign(state=dims.state_labels(totals["state_id"]))
+
+
+# ------------------ Transactions ------------------
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _transaction_by_state(version):
+    return _by_state("quarterly_state_transaction", ["total_transactions", "total_amount"])
+
+
+def transaction_by_state():
+    return _transaction_by_state(data.version("quarterly_state_transaction"))
+
+
+# ------------------ Registrations ------------------
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _state_registrations(version):
+    return _by_state("quarterly_registrations", ["total_registrations"])
+
+
+def state_registrations():
+    return _state_registrations(data.version("quarterly_registrations"))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _district_registrations(version, dims_version):
+    totals = _sums("district_user_summary", ["district_id"], ["registered_users"])
+    districts = data.districts()
+    return totals.assign(
+        state_id=districts["state_id"].to_numpy()[totals["district_id"]],
+    ).rename(columns={"registered_users": "total_registrations"})
+
+
+def district_registrations():
+    return _district_registrations(data.version("district_user_summary"), data.dims_version("district_user_summary"))
+
+
+# ------------------ Devices ------------------
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _device_users_by_state(version):
+    return _by_state("state_users_by_device", ["total_users"])
+
+
+def device_users_by_state():
+    return _device_users_by_state(data.version("state_users_by_device"))
+
+
+# ------------------ Insurance ------------------
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _insurance_by_state(version):
+    return _by_state("insurance_trend_by_state", ["total_insurance_transactions", "total_insurance_amount"])
+
+
+def insurance_by_state():
+    return _insurance_by_state(data.version("insurance_trend_by_state"))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _insurance_by_district(version, dims_version):
+    return query.select("district_insurance_transactions").rename(columns={
+        "total_transactions": "total_insurance_transactions",
+        "total_amount": "total_insurance_amount",
+    })
+
+
+def insurance_by_district():
+    return _insurance_by_district(
+        data.version("district_insurance_transactions"), data.dims_version("district_insurance_transactions"),
+    )
+
+
+# ------------------ Matrices ------------------
+# Dense float32 cross-tabs for the heatmaps, built once per data version, so a
+# heatmap or a cross-tab lookup is array slicing rather than a pivot per rerun.
+# `index` and `columns` hold the sorted row/column keys (ids or names) and the
+# *_labels arrays their display names.
+Matrix = namedtuple("Matrix", ["values", "index", "columns", "index_labels", "column_labels"])
+
+
+def _crosstab(rows, columns, values):
+    index, row_pos = np.unique(np.asarray(rows), return_inverse=True)
+    keys, col_pos = np.unique(np.asarray(columns), return_inverse=True)
+    totals = np.zeros((len(index), len(keys)))
+    np.add.at(totals, (row_pos, col_pos), np.asarray(values, dtype=np.float64))
+    return totals.astype(np.float32), index, keys
+
+
+# Zero-copy DataFrame view with display labels, for seaborn.
+def matrix_frame(matrix):
+    return pd.DataFrame(matrix.values, index=matrix.index_labels, columns=matrix.column_labels, copy=False)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _category_matrix(version):
+    # Summed per cell first, by the SQL backend when configured; the cross-tab is the same.
+    df = query.sums("transactions_by_state_category", ["state_id", "transaction_type"], ["total_transactions"])
+    values, index, columns = _crosstab(df["state_id"], df["transaction_type"], df["total_transactions"])
+    return Matrix(values, index, columns, dims.state_labels(index), columns)
+
+
+# State x transaction type, total transactions.
+def category_matrix():
+    return _category_matrix(data.version("transactions_by_state_category"))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _brand_matrices(version):
+    df = query.sums("state_users_by_device", ["state_id", "brand"], ["total_users"])
+    values, index, columns = _crosstab(df["state_id"], df["brand"], df["total_users"])
+    raw = Matrix(values, index, columns, dims.state_labels(index), columns)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = values / values.sum(axis=1, keepdims=True)
+    return raw, raw._replace(values=shares)
+
+
+# State x brand, total users; `normalized` gives each state's brand shares.
+def brand_matrix(normalized=False):
+    return _brand_matrices(data.version("state_users_by_device"))[1 if normalized else 0]
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _district_state_matrix(version, dims_version, n):
+    top = insurance_by_district().nlargest(n, "total_insurance_transactions")
+    values, index, columns = _crosstab(top["district_id"], top["state_id"], top["total_insurance_transactions"])
+    return Matrix(values, index, columns, data.district_labels(index), dims.state_labels(columns))
+
+
+# Top `n` districts by insurance transactions x their states.
+def district_state_matrix(n=25):
+    return _district_state_matrix(
+        data.version("district_insurance_transactions"), data.dims_version("district_insurance_transactions"), n,
+    )
@@ -1,34 +1,28 @@
-# app.py
 import streamlit as st
-import case_study_1
-import case_study_2
-import case_study_3
-import case_study_4
-import case_study_5
+import charts
+# The case studies import seaborn/plotly inside run(), so these imports stay cheap
+# and each plotting library loads only when a page that uses it first renders.
+from pages import PAGES
 
-st.set_page_config(page_title="📊 PhonePe Dashboard", layout="wide")
-st.title("📱 PhonePe Data Analysis – Business Case Studies")
+# Streamlit runs this script as __main__. Chart render workers import it as
+# __mp_main__ (see charts.PRELOAD) and must not draw the app.
+if __name__ == "__main__":
+    st.set_page_config(page_title="📊 PhonePe Dashboard", layout="wide")
+    st.title("📱 PhonePe Data Analysis – Business Case Studies")
 
-# Define tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Case Study 1: Decoding Transaction Dynamics on PhonePe",
-    "🏢 Case Study 2: Device Dominance and User Engagement Analysis",
-    "📍 Case Study 3: Insurance Engagement Analysis",
-    "💳 Case Study 4: User Engagement and Growth Strategy",
-    "📈 Case Study 5: Insurance Transactions Analysis"
-])
+    st.sidebar.radio(
+        "🖼️ Chart rendering:",
+        charts.RENDERERS,
+        index=charts.RENDERERS.index(charts.DEFAULT_RENDERER),
+        format_func={"matplotlib": "Static images", "plotly": "Interactive (Plotly)"}.get,
+        key="renderer",
+    )
 
-with tab1:
-    case_study_1.run()
+    # Define pages: st.navigation only executes the selected page's run(),
+    # so interacting with one case study no longer re-renders the other four.
+    pages = [
+        st.Page(module.run, title=title, icon=icon, url_path=url_path, default=i == 0)
+        for i, (module, title, icon, url_path) in enumerate(PAGES)
+    ]
 
-with tab2:
-    case_study_2.run()
-
-with tab3:
-    case_study_3.run()
-
-with tab4:
-    case_study_4.run()
-
-with tab5:
-    case_study_5.run()
+    st.navigation(pages, position="top").run()
@@ -0,0 +1,68 @@
+# bench_imports.py
+# Import-time benchmark for app start-up, driven by `python -X importtime`.
+# Imports every module app.py imports in a fresh interpreter, reports the
+# slowest imports, and exits non-zero when a plotting library is pulled in at
+# start-up or the total exceeds the budget, so it can gate regressions in CI.
+#
+#   python bench_imports.py                  # default budget
+#   python bench_imports.py --budget-ms 1500
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ["case_study_1", "case_study_2", "case_study_3", "case_study_4", "case_study_5"]
+
+# Must only be imported when a page renders (see case_study_N.run). Streamlit
+# itself imports the lazily-loading plotly.graph_objects shell, so it is not listed.
+DEFERRED = ["seaborn", "matplotlib", "plotly.express"]
+
+
+def measure():
+    # Returns {module: cumulative microseconds} for one cold interpreter start.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(MODULES)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("PHONEPE_IMPORT_BUDGET_MS", 2000)))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    totals = [sum(times[module] for module in MODULES if module in times) for times in runs]
+    # Modules are only reported by the interpreter that imported them first; the
+    # total therefore counts shared dependencies once.
+    total_ms = statistics.median(totals) / 1000
+
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+    print(f"{'module':<40}{'cumulative ms':>15}")
+    for module, us in slowest:
+        print(f"{module:<40}{us / 1000:>15.1f}")
+    print(f"\nstart-up imports: {total_ms:.1f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+
+    failures = [f"{module} imported at start-up" for module in DEFERRED if module in runs[-1]]
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"✗ {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# bench_leaks.py
+# Memory regression check for the case studies. Each case_study_N.run() is
+# executed many times under Streamlit's AppTest in its own process, with the
+# chart cache cleared before every run so each rerun draws all of its figures
+# again. After a warm-up (data loaded, imports done) the process's resident
+# memory must stay flat and no figure may be left registered with pyplot; the
+# check exits non-zero otherwise, so it can gate regressions in CI.
+#
+#   python bench_leaks.py                              # 500 runs of case studies 1-5
+#   python bench_leaks.py --runs 50 --case-studies 5   # quick check of one page
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _rss_mb():
+    # Current resident set size; ru_maxrss (the peak, in kilobytes) where /proc is missing.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ------------------ Worker (one case study, one process) ------------------
+def worker(n, runs, warmup):
+    import gc
+    import warnings
+    warnings.filterwarnings("ignore")
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from streamlit.testing.v1 import AppTest
+
+    import charts
+    import pages
+
+    at = AppTest.from_string(pages.script(f"case_study_{n}"), default_timeout=600)
+    rss, figures = [], []
+    for i in range(runs):
+        charts.clear()
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"case study {n}, run {i + 1}: {at.exception[0].value}")
+        gc.collect()
+        rss.append(_rss_mb())
+        figures.append(len(plt.get_fignums()))
+    # RSS is compared as medians over `warmup` runs at either end, since a single
+    # sample can land on a transient peak or dip of the allocator.
+    return {
+        "baseline": {"rss_mb": statistics.median(rss[warmup:2 * warmup]), "figures": figures[warmup - 1]},
+        "rss_mb": statistics.median(rss[-warmup:]),
+        "figures": figures[-1],
+    }
+
+
+# ------------------ Driver ------------------
+def run_worker(n, runs, warmup):
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", str(n), "--runs", str(runs), "--warmup", str(warmup)],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--case-studies", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=10, help="runs before the baseline, and runs per RSS median")
+    parser.add_argument("--max-growth-mb", type=float, default=float(os.environ.get("PHONEPE_LEAK_BUDGET_MB", 25)))
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    warmup = max(1, min(args.warmup, args.runs // 2))
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.runs, warmup)))
+        return 0
+
+    print(f"{'case study':<12}{'runs':>6}{'RSS after warm-up':>19}{'RSS at end':>12}{'growth':>9}{'figures':>9}")
+    failures = []
+    for n in args.case_studies:
+        try:
+            result = run_worker(n, args.runs, warmup)
+        except RuntimeError as e:
+            failures.append(str(e))
+            continue
+        baseline = result["baseline"]
+        growth = result["rss_mb"] - baseline["rss_mb"]
+        print(
+            f"{'cs' + str(n):<12}{args.runs:>6}{baseline['rss_mb']:>16.0f} MB{result['rss_mb']:>9.0f} MB"
+            f"{growth:>+6.0f} MB{baseline['figures']:>4} → {result['figures']}"
+        )
+        if growth > args.max_growth_mb:
+            failures.append(f"cs{n}: RSS grew {growth:.0f} MB over {args.runs - 2 * warmup} runs (budget {args.max_growth_mb:.0f} MB)")
+        if result["figures"] != baseline["figures"] or result["figures"]:
+            failures.append(f"cs{n}: {result['figures']} figures left open (after warm-up: {baseline['figures']})")
+    for failure in failures:
+        print(f"✗ {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
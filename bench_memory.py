@@ -0,0 +1,47 @@
+# bench_memory.py
+# In-memory size of every dataset, as parsed with the schema dtypes (string
+# dimensions, int64 counts) and in the compact form data.load() keeps
+# (categorical dimensions, narrowed counts; see data.compact). Sizes are
+# pandas' deep memory usage, so string storage is counted in full.
+#
+#   python bench_memory.py                          # every dataset
+#   python bench_memory.py district_user_summary    # selected datasets
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(name):
+    import data
+
+    df = data.read_csv(name)
+    return len(df), df.memory_usage(deep=True).sum(), data.compact(df).memory_usage(deep=True).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help="datasets to measure (default: all)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import data
+
+    print(f"{'dataset':<34}{'rows':>9}{'before':>13}{'after':>13}{'saved':>8}")
+    total_before = total_after = 0
+    for name in args.names or data.SCHEMAS:
+        if name not in data.SCHEMAS:
+            print(f"✗ {name}: unknown dataset", file=sys.stderr)
+            return 1
+        rows, before, after = measure(name)
+        total_before += before
+        total_after += after
+        print(f"{name:<34}{rows:>9,}{before:>13,}{after:>13,}{1 - after / before:>8.0%}")
+    print(f"{'total':<34}{'':>9}{total_before:>13,}{total_after:>13,}{1 - total_after / total_before:>8.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# bench_run.py
+# Headless end-to-end benchmark of the case studies. Each case_study_N.run() is
+# executed under Streamlit's AppTest (no browser, no server) with scripted
+# widget interactions, and every step is broken down into:
+#
+#   parse      reading data files (data._read_raw)
+#   transform  pandas work, widgets and Streamlit overhead (the remainder)
+#   draw       matplotlib/seaborn drawing on chart-cache misses
+#   encode     savefig rasterization on chart-cache misses
+#
+# plus the payload sent to the client and the worker's peak RSS. Synthetic
+# copies of the data can be generated at larger scales to find scaling cliffs.
+#
+#   python bench_run.py                             # case studies 1-5 at 1x, 10x, 100x
+#   python bench_run.py --scales 1 10 --case-studies 1 4 --columnar
+#   python bench_run.py --renderer plotly            # client-side charts
+
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Scripted interactions, applied one after another after the first (cold) run.
+INTERACTIONS = {
+    1: [
+        ("metric → amount", lambda at, dims: at.radio[0].set_value("Total Amount")),
+        ("add state", lambda at, dims: at.multiselect[0].select(dims.state_id("uttar pradesh"))),
+        ("category state", lambda at, dims: at.selectbox[0].set_value(dims.state_id("karnataka"))),
+    ],
+    4: [
+        ("district state", lambda at, dims: at.selectbox[0].set_value(dims.state_id("uttar pradesh"))),
+        ("district state", lambda at, dims: at.selectbox[0].set_value(dims.state_id("karnataka"))),
+    ],
+}
+
+
+# ------------------ Synthetic data ------------------
+# Copies are made distinct along the dataset's finest key so the rollups see
+# more entities, not duplicate rows. Datasets keyed only by state (a fixed set)
+# are copied unchanged.
+def _scale_rows(rows, columns, copy):
+    if "pincode" in columns:
+        return [{**row, "pincode": f"{row['pincode']}{copy:03d}"} for row in rows]
+    for column in ("district", "brand", "transaction_type"):
+        if column in columns:
+            return [{**row, column: f"{row[column]} {copy}"} for row in rows]
+    if "year" in columns:
+        return [{**row, "year": str(int(row["year"]) - 10 * copy)} for row in rows]
+    return None
+
+
+def make_dataset(source_dir, target_dir, scale, names):
+    os.makedirs(target_dir, exist_ok=True)
+    for name in names:
+        with open(os.path.join(source_dir, f"{name}.csv"), newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            columns, rows = reader.fieldnames, list(reader)
+        with open(os.path.join(target_dir, f"{name}.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, columns, quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+            writer.writerows(rows)
+            for copy in range(1, scale):
+                scaled = _scale_rows(rows, columns, copy)
+                if scaled is None:
+                    break
+                writer.writerows(scaled)
+
+
+# ------------------ Worker (one case study, one process) ------------------
+def _payload_bytes(node):
+    proto = getattr(node, "proto", None)
+    size = proto.ByteSize() if proto is not None and hasattr(proto, "ByteSize") else 0
+    return size + sum(_payload_bytes(child) for child in getattr(node, "children", {}).values())
+
+
+def worker(n):
+    import warnings
+    warnings.filterwarnings("ignore")
+
+    from streamlit.testing.v1 import AppTest
+
+    import dims
+    import metrics
+    import pages
+
+    at = AppTest.from_string(pages.script(f"case_study_{n}"), default_timeout=600)
+    steps = [("cold", None)] + INTERACTIONS.get(n, []) + [("rerun", None)]
+    results = []
+    for label, interact in steps:
+        if interact is not None:
+            interact(at, dims)
+        metrics.snapshot(reset=True)
+        start = time.perf_counter()
+        at.run()
+        wall = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"case study {n}, step {label}: {at.exception[0].value}")
+        measured = metrics.snapshot(reset=True)
+        seconds = {phase: measured["seconds"].get(phase, 0.0) for phase in metrics.PHASES}
+        results.append({
+            "step": label,
+            "wall": wall,
+            **seconds,
+            "transform": max(wall - sum(seconds.values()), 0.0),
+            "payload_bytes": _payload_bytes(at._tree) + measured["counters"].get("chart_bytes", 0),
+        })
+    # ru_maxrss is in kilobytes on Linux.
+    return {"steps": results, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+# ------------------ Driver ------------------
+def run_worker(n, data_dir, renderer):
+    env = {**os.environ, "PHONEPE_DATA_DIR": data_dir}
+    if renderer:
+        env["PHONEPE_RENDERER"] = renderer
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", str(n)],
+        capture_output=True, text=True, cwd=ROOT, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def report(scale, n, result):
+    for step in result["steps"]:
+        print(
+            f"{scale:>5}x  cs{n}  {step['step']:<16}"
+            f"{step['wall'] * 1000:>9.0f}{step['parse'] * 1000:>9.0f}{step['transform'] * 1000:>11.0f}"
+            f"{step['draw'] * 1000:>9.0f}{step['encode'] * 1000:>9.0f}{step['payload_bytes'] / 1024:>12.1f}"
+        )
+    print(f"{'':>11}peak RSS {result['peak_rss_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--case-studies", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--columnar", action="store_true", help="ingest the synthetic data to Feather first")
+    parser.add_argument("--renderer", choices=["matplotlib", "plotly"], help="default: PHONEPE_RENDERER or matplotlib")
+    parser.add_argument("--json", help="also write the raw results to this file")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker)))
+        return 0
+
+    sys.path.insert(0, ROOT)
+    import data
+
+    print(f"{'scale':>6}  cs   {'step':<16}{'wall ms':>9}{'parse':>9}{'transform':>11}{'draw':>9}{'encode':>9}{'payload KB':>12}")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="phonepe-bench-") as tmp:
+        for scale in args.scales:
+            data_dir = os.path.join(tmp, f"x{scale}")
+            make_dataset(data.DATA_DIR, data_dir, scale, data.SCHEMAS)
+            if args.columnar:
+                subprocess.run([sys.executable, "ingest.py"], cwd=ROOT, env={**os.environ, "PHONEPE_DATA_DIR": data_dir}, check=True, capture_output=True)
+            for n in args.case_studies:
+                results[f"{scale}x/cs{n}"] = result = run_worker(n, data_dir, args.renderer)
+                report(scale, n, result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# bench_stream.py
+# Bounded-memory check for `python ingest.py stream`. Writes a synthetic
+# pincode x quarter x category transaction file over the real state and
+# district dimension, then streams it into each dataset in its own process,
+# against a scratch copy of the data directory. The check exits non-zero when
+# a stream's peak RSS exceeds the budget, so it can gate regressions in CI: the
+# peak has to stay flat however long the file is.
+#
+#   python bench_stream.py                               # 50M rows, 1024 MB budget
+#   python bench_stream.py --rows 5000000 --max-rss 768 --dir /var/tmp
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# One quarterly (state x quarter) and one district-grain fact.
+DATASETS = ["quarterly_state_transaction", "district_insurance_transactions"]
+
+
+# ------------------ Synthetic data ------------------
+# Written chunk by chunk, so writing the file is bounded too.
+def make_synthetic(file, rows, chunksize=1_000_000, seed=0):
+    import numpy as np
+    import pandas as pd
+
+    import data
+    import dims
+
+    rng = np.random.default_rng(seed)
+    districts = data.districts()
+    district_states = np.asarray(dims.STATES, dtype=object)[districts["state_id"].to_numpy()]
+    district_names = districts["district"].to_numpy(dtype=object)
+    types = np.array(["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments", "Financial Services", "Others"], dtype=object)
+    for start in range(0, rows, chunksize):
+        n = min(chunksize, rows - start)
+        at = rng.integers(0, len(districts), n)
+        pd.DataFrame({
+            "state": district_states[at],
+            "district": district_names[at],
+            "pincode": rng.integers(110001, 855118, n),
+            "year": rng.integers(2018, 2025, n),
+            "quarter": rng.integers(1, 5, n),
+            "transaction_type": types[rng.integers(0, len(types), n)],
+            "total_transactions": rng.integers(1, 10_000, n),
+            "total_amount": rng.random(n) * 1e7,
+        }).to_csv(file, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+# ------------------ Worker (one dataset, one process) ------------------
+def worker(name, file):
+    import ingest
+
+    start = time.perf_counter()
+    rows, stored = ingest.stream(name, file)
+    return {
+        "rows": rows,
+        "stored": stored,
+        "seconds": time.perf_counter() - start,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+# ------------------ Driver ------------------
+def run_worker(name, file, data_dir):
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", name, file],
+        capture_output=True, text=True, cwd=ROOT, env={**os.environ, "PHONEPE_DATA_DIR": data_dir},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{name}: " + result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--datasets", nargs="+", default=DATASETS)
+    parser.add_argument("--max-rss", type=float, metavar="MB", default=float(os.environ.get("PHONEPE_STREAM_BUDGET_MB", 1024)))
+    parser.add_argument("--dir", help="where to put the scratch data directory (default: the system temp dir)")
+    parser.add_argument("--worker", nargs=2, metavar=("DATASET", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(*args.worker)))
+        return 0
+
+    sys.path.insert(0, ROOT)
+    import data
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as scratch:
+        for name in data.SCHEMAS:
+            shutil.copy(data.path(name), scratch)
+        file = os.path.join(scratch, "synthetic_transactions.csv")
+        start = time.perf_counter()
+        make_synthetic(file, args.rows)
+        print(f"synthetic input: {args.rows:,} rows, {os.path.getsize(file) / 2**20:,.0f} MB in {time.perf_counter() - start:.0f}s\n")
+
+        print(f"{'dataset':<34}{'rows in':>14}{'rows out':>10}{'rows/s':>12}{'peak RSS':>11}")
+        failures = []
+        for name in args.datasets:
+            try:
+                result = run_worker(name, file, scratch)
+            except RuntimeError as e:
+                failures.append(str(e))
+                continue
+            print(
+                f"{name:<34}{result['rows']:>14,}{result['stored']:>10,}"
+                f"{result['rows'] / result['seconds']:>12,.0f}{result['peak_mb']:>8,.0f} MB"
+            )
+            if result["rows"] != args.rows:
+                failures.append(f"{name}: streamed {result['rows']:,} of {args.rows:,} rows")
+            if result["peak_mb"] > args.max_rss:
+                failures.append(f"{name}: peak RSS {result['peak_mb']:,.0f} MB exceeds {args.max_rss:,.0f} MB")
+    for failure in failures:
+        print(f"✗ {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
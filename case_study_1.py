@@ -1,157 +1,229 @@
 # case_study_1.py
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import aggregate
+import charts
+import dims
+import insights
+import periods
+import plots
+import query
+import trends
+
+# ------------------ Charts ------------------
+def draw_states(ax1, filtered_state_df, metric_col, metric_type):
+    import seaborn as sns
+
+    sns.barplot(data=filtered_state_df, y='state', x=metric_col, palette="coolwarm", ax=ax1)
+    ax1.set_title(f"{metric_type} by Selected States")
+    ax1.set_xlabel(metric_type)
+
+
+def selected_quarterly(quarterly_trend, selected_states):
+    quarterly = quarterly_trend[quarterly_trend['state_id'].isin(selected_states)]
+    return quarterly.assign(state=dims.state_labels(quarterly['state_id']))
+
+
+def draw_quarterly(ax2, quarterly_trend, selected_states):
+    import seaborn as sns
+
+    quarterly = selected_quarterly(quarterly_trend, selected_states)
+    sns.lineplot(data=quarterly, x="year_quarter", y="total_transactions", hue="state", marker="o", ax=ax2)
+    ax2.set_title("Quarterly Transactions Over Time")
+    ax2.set_ylabel("transactions")
+    ax2.tick_params(axis='x', labelrotation=45)
+
+
+def draw_categories(ax3, cat_filtered, selected_category_state):
+    import seaborn as sns
+
+    sns.barplot(data=cat_filtered, x='transaction_type', y='total_transactions', order=cat_filtered['transaction_type'], palette='pastel', ax=ax3)
+    ax3.set_title(f"Transaction Categories – {dims.state_label(selected_category_state)}")
+    ax3.tick_params(axis='x', labelrotation=30)
+
+
+def draw_share(ax4, pie_data):
+    ax4.pie(pie_data["total_transactions"], labels=pie_data["transaction_type"], autopct='%1.1f%%', startangle=140, radius=0.7)
+    ax4.set_title("Overall Transaction Share by Category")
+    ax4.axis("equal")
+
+
+def draw_heatmap(ax5, category_matrix):
+    import seaborn as sns
+
+    sns.heatmap(aggregate.matrix_frame(category_matrix), cmap="YlGnBu", linewidths=0.5, ax=ax5)
+    ax5.set_title("Heatmap: Transaction Categories by State")
+    ax5.set_xlabel("transaction_type")
+
 
 def run():
     st.header("📊 Case Study 1: Decoding Transaction Dynamics on PhonePe")
 
-    # Load CSVs (can be moved to main app and passed as arguments too)
-    txn_by_state = pd.read_csv("transaction_by_state.csv")
-    quarterly_trend = pd.read_csv("quarterly_trend_by_state.csv")
-    txn_by_category = pd.read_csv("transactions_by_state_category.csv")
+    txn_by_state = aggregate.transaction_by_state()
+    # Row count and India-wide category totals, from the SQL backend when configured.
+    category_rows = query.count("transactions_by_state_category")
+    category_share = query.sums("transactions_by_state_category", "transaction_type", ["total_transactions"])
 
     metric_type = st.radio("📊 Select Metric:", ["Total Transactions", "Total Amount"])
     metric_col = "total_transactions" if metric_type == "Total Transactions" else "total_amount"
 
-    selected_states = st.multiselect("Select State(s):", sorted(txn_by_state["state"].unique()), default=["maharashtra", "karnataka", "telangana"])
-    filtered_state_df = txn_by_state[txn_by_state["state"].isin(selected_states)].sort_values(by=metric_col, ascending=False)
+    state_options = [i for i in dims.STATE_IDS if i in set(txn_by_state["state_id"])]
+    default_states = [dims.state_id(name) for name in ["maharashtra", "karnataka", "telangana"]]
+    selected_states = st.multiselect("Select State(s):", state_options, default=default_states, format_func=dims.state_label)
+    filtered_state_df = txn_by_state[txn_by_state["state_id"].isin(selected_states)].sort_values(by=metric_col, ascending=False)
+    filtered_state_df = filtered_state_df.assign(state=dims.state_labels(filtered_state_df["state_id"]))
 
-    col1, col2 = st.columns(2)
-    with col1:
-        fig1, ax1 = plt.subplots(figsize=(6,5))
-        sns.barplot(data=filtered_state_df, y='state', x=metric_col, palette="coolwarm", ax=ax1)
-        ax1.set_title(f"{metric_type} by Selected States")
-        ax1.set_xlabel(metric_type)
-        st.pyplot(fig1)
+    with charts.parallel():
+        col1, col2 = st.columns(2)
+        with col1:
+            def plot_states():
+                return plots.bar(filtered_state_df['state'], filtered_state_df[metric_col], f"{metric_type} by Selected States", xlabel=metric_type, horizontal=True)
+            charts.pyplot("cs1.states", draw_states, (6,5), deps=["quarterly_state_transaction"], params=(metric_col, tuple(selected_states)), rows=len(filtered_state_df), plot=plot_states, args=(filtered_state_df, metric_col, metric_type))
 
-    with col2:
-        top5 = filtered_state_df.head(5)
-        st.markdown("### 🔝 Top 5 Insights")
-        for i, row in top5.iterrows():
-            val = f"{int(row[metric_col]):,}" if metric_type == "Total Transactions" else f"₹{int(row[metric_col]):,}"
-            st.markdown(f"**{row['state'].title()}**: {val}")
+        with col2:
+            top5 = filtered_state_df.head(5)
+            insights.panel("🔝 Top 5 Insights", top5['state'], top5[metric_col], currency=metric_type == "Total Amount")
 
-    st.markdown("---")
-    st.markdown("### 📈 Quarterly Transaction Trend")
+        st.markdown("""
+        ---
 
-    quarterly = quarterly_trend[quarterly_trend['state'].isin(selected_states)].copy()
-    quarterly['year_quarter'] = quarterly['year'].astype(str) + " Q" + quarterly['quarter'].astype(str)
+        ### 📈 Quarterly Transaction Trend
+        """)
 
-    fig2, ax2 = plt.subplots(figsize=(10,5))
-    sns.lineplot(data=quarterly, x="year_quarter", y="transactions", hue="state", marker="o", ax=ax2)
-    ax2.set_title("Quarterly Transactions Over Time")
-    plt.xticks(rotation=45)
-    st.pyplot(fig2)
+        start, end = periods.range_slider("quarterly_state_transaction")
+        quarterly_trend = periods.select("quarterly_state_transaction", start, end, columns=["state", "year", "quarter", "total_transactions"])
 
-    st.markdown("---")
-    col5, col6 = st.columns(2)
-    with col5:
-        st.markdown("### 🧾 Transaction Category Breakdown")
+        def plot_quarterly():
+            return plots.lines(selected_quarterly(quarterly_trend, selected_states), "year_quarter", "total_transactions", "state", "Quarterly Transactions Over Time", ylabel="transactions")
+        charts.pyplot("cs1.quarterly", draw_quarterly, (10,5), deps=["quarterly_state_transaction"], params=(tuple(selected_states), start, end), rows=int(quarterly_trend["state_id"].isin(selected_states).sum()), plot=plot_quarterly, args=(quarterly_trend, selected_states))
 
-        selected_category_state = st.selectbox("📍 Choose a state for category view:", selected_states)
-        cat_filtered = txn_by_category[txn_by_category['state'] == selected_category_state]
+        # Growth and anomalies from the data itself (see trends.py), over every quarter.
+        growth = trends.summary("transactions").nlargest(5, "cagr")
+        insights.panel(f"🚀 Fastest-Growing States (Transactions CAGR to {trends.latest('transactions')})", growth["label"], growth["cagr"], percent=True)
+        unusual = trends.anomalies("transactions").head(5)
+        if len(unusual):
+            insights.panel("⚠️ Most Unusual Quarters (QoQ change)", unusual["label"] + " – " + unusual["year_quarter"], unusual["qoq"], percent=True)
 
-        fig3, ax3 = plt.subplots(figsize=(6,5))
-        sns.barplot(data=cat_filtered, x='transaction_type', y='total_transactions', palette='pastel', ax=ax3)
-        ax3.set_title(f"Transaction Categories – {selected_category_state.title()}")
-        plt.xticks(rotation=30)
-        st.pyplot(fig3)
+        st.markdown("---")
+        col5, col6 = st.columns(2)
+        with col5:
+            st.markdown("### 🧾 Transaction Category Breakdown")
 
-    with col6:
-        st.markdown("### 🥧 India-Wide Category Share")
+            selected_category_state = st.selectbox("📍 Choose a state for category view:", selected_states, format_func=dims.state_label)
 
-        pie_data = txn_by_category.groupby("transaction_type")["total_transactions"].sum().reset_index()
+            cat_filtered = query.select("transactions_by_state_category", ["transaction_type", "total_transactions"], state_id=selected_category_state)
 
-        fig4, ax4 = plt.subplots(figsize=(4,4))
-        ax4.pie(pie_data["total_transactions"], labels=pie_data["transaction_type"], autopct='%1.1f%%', startangle=140, radius=0.7)
-        ax4.set_title("Overall Transaction Share by Category")
-        ax4.axis("equal")
-        st.pyplot(fig4)
+            def plot_categories():
+                return plots.bar(cat_filtered['transaction_type'], cat_filtered['total_transactions'], f"Transaction Categories – {dims.state_label(selected_category_state)}")
+            charts.pyplot("cs1.categories", draw_categories, (6,5), deps=["transactions_by_state_category"], params=selected_category_state, rows=len(cat_filtered), plot=plot_categories, args=(cat_filtered, selected_category_state))
 
-    st.markdown("---")
-    st.markdown("### 🔥 Heatmap: State vs Category")
+        with col6:
+            st.markdown("### 🥧 India-Wide Category Share")
 
-    pivot = txn_by_category.pivot(index='state', columns='transaction_type', values='total_transactions').fillna(0)
-    fig5, ax5 = plt.subplots(figsize=(14,10))
-    sns.heatmap(pivot, cmap="YlGnBu", linewidths=0.5, ax=ax5)
-    ax5.set_title("Heatmap: Transaction Categories by State")
-    st.pyplot(fig5)
+            def plot_share():
+                return plots.pie(category_share["transaction_type"], category_share["total_transactions"], "Overall Transaction Share by Category")
+            charts.pyplot("cs1.share", draw_share, (4,4), deps=["transactions_by_state_category"], rows=category_rows, plot=plot_share, args=(category_share,))
+
+        st.markdown("""
+        ---
+
+        ### 🔥 Heatmap: State vs Category
+        """)
+
+        category_matrix = aggregate.category_matrix()
+
+        def plot_heatmap():
+            return plots.heatmap(category_matrix, "Heatmap: Transaction Categories by State")
+        charts.pyplot("cs1.heatmap", draw_heatmap, (14,10), deps=["transactions_by_state_category"], rows=category_rows, plot=plot_heatmap, args=(category_matrix,))
 
     st.subheader("📊 Key Insights & Actionable Recommendations from Data Analysis")
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("### 🔍 **Key Insights from Data Analysis & Visualizations**")
-
-        st.markdown("#### **Top 10 States by Total Transactions & Amount**")
-        st.markdown("- **Maharashtra** leads in total transactions, followed by **Karnataka** and **Telangana**.")
-        st.markdown("- In terms of total transaction amount, **Telangana**, **Karnataka**, and **Maharashtra** dominate.")
-        st.markdown("- **Andhra Pradesh**, **Uttar Pradesh**, **Rajasthan**, and **Madhya Pradesh** show high transaction volumes and amounts, reflecting growing digital adoption.")
-        st.markdown("- **Odisha**, **Bihar**, and **West Bengal** rank lower but show emerging growth potential.")
-
-        st.markdown("#### **Quarterly Transaction Trend in Top States**")
-        st.markdown("- Consistent growth observed across all top-performing states.")
-        st.markdown("- **Maharashtra** and **Karnataka** show steady, strong quarter-over-quarter growth.")
-        st.markdown("- **Telangana** shows an increasing trend with slight quarterly fluctuations.")
-        st.markdown("- Other states like **Andhra Pradesh** and **Uttar Pradesh** show moderate, steady growth.")
-
-        st.markdown("#### **Transaction Categories Across Top States**")
-        st.markdown("- **Merchant Payments** dominate across all top 5 states.")
-        st.markdown("- **Peer-to-Peer (P2P) Payments** form the second-largest share.")
-        st.markdown("- Categories like **Recharge & Bill Payments** and **Financial Services** are smaller but have growth potential.")
-
-        st.markdown("#### **Transaction Split by Category (National Level)**")
-        st.markdown("- **Merchant Payments:** 55.4% of all transactions.")
-        st.markdown("- **Peer-to-Peer Payments:** 36.1%.")
-        st.markdown("- **Recharge & Bill Payments:** 6.3%.")
-        st.markdown("- Financial Services & Others: Marginal shares.")
-
-        st.markdown("#### **Heatmap of Transaction Categories by State**")
-        st.markdown("- High density of **Merchant & P2P Payments** in **Maharashtra**, **Karnataka**, **Telangana**, and **Madhya Pradesh**.")
-        st.markdown("- Low activity in smaller states/UTs like **Arunachal Pradesh**, **Lakshadweep**, and **Andaman & Nicobar Islands**.")
-        st.markdown("- Moderate usage in **Punjab**, **Rajasthan**, and **Uttar Pradesh**.")
+        st.markdown("""
+        ### 🔍 **Key Insights from Data Analysis & Visualizations**
+
+        #### **Top 10 States by Total Transactions & Amount**
+
+        - **Maharashtra** leads in total transactions, followed by **Karnataka** and **Telangana**.
+        - In terms of total transaction amount, **Telangana**, **Karnataka**, and **Maharashtra** dominate.
+        - **Andhra Pradesh**, **Uttar Pradesh**, **Rajasthan**, and **Madhya Pradesh** show high transaction volumes and amounts, reflecting growing digital adoption.
+        - **Odisha**, **Bihar**, and **West Bengal** rank lower but show emerging growth potential.
+
+        #### **Quarterly Transaction Trend in Top States**
+
+        - Consistent growth observed across all top-performing states.
+        - **Maharashtra** and **Karnataka** show steady, strong quarter-over-quarter growth.
+        - **Telangana** shows an increasing trend with slight quarterly fluctuations.
+        - Other states like **Andhra Pradesh** and **Uttar Pradesh** show moderate, steady growth.
+
+        #### **Transaction Categories Across Top States**
+
+        - **Merchant Payments** dominate across all top 5 states.
+        - **Peer-to-Peer (P2P) Payments** form the second-largest share.
+        - Categories like **Recharge & Bill Payments** and **Financial Services** are smaller but have growth potential.
+
+        #### **Transaction Split by Category (National Level)**
+
+        - **Merchant Payments:** 55.4% of all transactions.
+        - **Peer-to-Peer Payments:** 36.1%.
+        - **Recharge & Bill Payments:** 6.3%.
+        - Financial Services & Others: Marginal shares.
+
+        #### **Heatmap of Transaction Categories by State**
+
+        - High density of **Merchant & P2P Payments** in **Maharashtra**, **Karnataka**, **Telangana**, and **Madhya Pradesh**.
+        - Low activity in smaller states/UTs like **Arunachal Pradesh**, **Lakshadweep**, and **Andaman & Nicobar Islands**.
+        - Moderate usage in **Punjab**, **Rajasthan**, and **Uttar Pradesh**.
+        """)
 
     with col2:
-        st.markdown("### 📝 **Actionable Recommendations**")
+        st.markdown("""
+        ### 📝 **Actionable Recommendations**
+
+        #### **Expand in Top-Performing States**
+
+        - Focus on **Maharashtra**, **Karnataka**, **Telangana**, and **Andhra Pradesh**.
+        - Launch exclusive cashback offers and merchant tie-ups.
+        - Run localized campaigns to boost transaction frequency and volume.
 
-        st.markdown("#### **Expand in Top-Performing States**")
-        st.markdown("- Focus on **Maharashtra**, **Karnataka**, **Telangana**, and **Andhra Pradesh**.")
-        st.markdown("- Launch exclusive cashback offers and merchant tie-ups.")
-        st.markdown("- Run localized campaigns to boost transaction frequency and volume.")
+        #### **Strengthen Merchant Ecosystem**
 
-        st.markdown("#### **Strengthen Merchant Ecosystem**")
-        st.markdown("- Introduce advanced merchant tools like analytics dashboards, credit lines, and loyalty programs.")
-        st.markdown("- Incentivize merchants to encourage digital payments.")
+        - Introduce advanced merchant tools like analytics dashboards, credit lines, and loyalty programs.
+        - Incentivize merchants to encourage digital payments.
 
-        st.markdown("#### **Boost Under-Utilized Categories**")
-        st.markdown("- Promote **Recharge & Bill Payments** and **Financial Services** through bundled offers & discounts.")
-        st.markdown("- Educate users via targeted in-app promotions on category benefits.")
+        #### **Boost Under-Utilized Categories**
 
-        st.markdown("#### **Penetrate Emerging Regions**")
-        st.markdown("- Focus on states like **Uttar Pradesh**, **Rajasthan**, and **Madhya Pradesh** with:")
-        st.markdown("  - Regional language marketing.")
-        st.markdown("  - Partnerships with local governments for digital literacy drives.")
-        st.markdown("  - Referral programs for first-time users.")
+        - Promote **Recharge & Bill Payments** and **Financial Services** through bundled offers & discounts.
+        - Educate users via targeted in-app promotions on category benefits.
 
-        st.markdown("#### **Address Low-Adoption States/UTs**")
-        st.markdown("- Launch pilot programs in low-adoption areas with:")
-        st.markdown("  - Zero-transaction fee incentives.")
-        st.markdown("  - Special promotions during regional festivals.")
-        st.markdown("  - Partnerships with local organizations for awareness drives.")
+        #### **Penetrate Emerging Regions**
 
-        st.markdown("#### **Quarterly Monitoring for Agile Strategy**")
-        st.markdown("- Monitor quarterly growth closely.")
-        st.markdown("- Adjust marketing budgets dynamically based on performance.")
-        st.markdown("- Quickly address sharp dips or surges to optimize strategy.")
+        - Focus on states like **Uttar Pradesh**, **Rajasthan**, and **Madhya Pradesh** with:
+          - Regional language marketing.
+          - Partnerships with local governments for digital literacy drives.
+          - Referral programs for first-time users.
 
-    st.markdown("---")
+        #### **Address Low-Adoption States/UTs**
+
+        - Launch pilot programs in low-adoption areas with:
+          - Zero-transaction fee incentives.
+          - Special promotions during regional festivals.
+          - Partnerships with local organizations for awareness drives.
+
+        #### **Quarterly Monitoring for Agile Strategy**
+
+        - Monitor quarterly growth closely.
+        - Adjust marketing budgets dynamically based on performance.
+        - Quickly address sharp dips or surges to optimize strategy.
+        """)
 
-    st.markdown("### ✅ **Conclusion**")
     st.markdown("""
+    ---
+
+    ### ✅ **Conclusion**
+
     This analysis highlights strong growth in key Indian states, particularly in **Merchant Payments** and **P2P Payments**.
     By leveraging these insights, PhonePe can:
     - Prioritize high-impact regions.
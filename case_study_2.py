@@ -1,41 +1,37 @@
 # case_study_2.py
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import aggregate
+import charts
+import data
+import dims
+import insights
+import periods
+import plots
+import rankings
+import trends
+
+# ------------------ Charts ------------------
+def draw_app_open(ax1, device_engagement):
+    import seaborn as sns
 
-def run():
-    st.header("🏢 Case Study 2: Device Dominance and User Engagement")
-
-    # Load data
-    device_engagement = pd.read_csv("device_users_by_brand.csv")
-    state_users_by_device = pd.read_csv("state_users_by_device.csv")
-    normalized_device_state = pd.read_csv("state_users_by_device.csv")
-    quarterly_brand_usage_trend = pd.read_csv("quarterly_brand_usage_trend.csv")
-
-    # --- Visualization 1: Avg. App Open % ---
-    st.subheader("📊 Avg. App Open % by Device Brand")
-    fig1, ax1 = plt.subplots(figsize=(8, 5))
     sorted_df = device_engagement.sort_values(by="avg_app_open_percentage", ascending=False)
-    sns.barplot(data=sorted_df, x="brand", y="avg_app_open_percentage", palette="Set2", ax=ax1)
+    sns.barplot(data=sorted_df, x="brand", y="avg_app_open_percentage", order=sorted_df["brand"], palette="Set2", ax=ax1)
     ax1.set_title("Avg. App Open % per Device Brand")
     ax1.set_ylabel("Avg. App Open Percentage (%)")
     ax1.set_xticklabels(ax1.get_xticklabels(), rotation=45)
-    st.pyplot(fig1)
 
-    # --- Visualization 2: Total Registered Users ---
-    st.subheader("👥 Total Registered Users by Brand")
-    fig2, ax2 = plt.subplots(figsize=(8, 5))
+
+def draw_brand_users(ax2, device_engagement):
+    import seaborn as sns
+
     sorted_df = device_engagement.sort_values(by="total_registered_users", ascending=False)
-    sns.barplot(data=sorted_df, x="brand", y="total_registered_users", palette="pastel", ax=ax2)
+    sns.barplot(data=sorted_df, x="brand", y="total_registered_users", order=sorted_df["brand"], palette="pastel", ax=ax2)
     ax2.set_title("Total Registered Users per Device Brand")
     ax2.set_ylabel("Total Registered Users")
     ax2.set_xticklabels(ax2.get_xticklabels(), rotation=45)
-    st.pyplot(fig2)
 
-    # --- Combined Bar + Line Chart ---
-    st.subheader("📊 Device Brand: Users vs. Engagement")
-    fig3, ax3 = plt.subplots(figsize=(12, 5))
+
+def draw_users_vs_engagement(ax3, device_engagement):
     bar = ax3.bar(device_engagement["brand"], device_engagement["total_registered_users"], label="Total Users", color="skyblue")
     ax3.set_ylabel("Total Registered Users", color="blue")
     ax3.tick_params(axis='y', labelcolor='blue')
@@ -47,133 +43,202 @@ def run():
 
     ax3.set_title("Device Brand: Users vs. Engagement")
     ax3.set_xticklabels(device_engagement["brand"], rotation=45)
-    st.pyplot(fig3)
 
-    # Get top 5 states by total users
-    top_states = state_users_by_device.groupby('state')['total_users'].sum().nlargest(5).index.tolist()
-    filtered_df = state_users_by_device[state_users_by_device['state'].isin(top_states)]
 
-    fig3, ax3 = plt.subplots(figsize=(12, 6))
-    sns.barplot(data=filtered_df, x='state', y='total_users', hue='brand', ax=ax3)
+def draw_top_states(ax3, filtered_df):
+    import seaborn as sns
+
+    sns.barplot(data=filtered_df, x='state', y='total_users', hue='brand', hue_order=filtered_df['brand'].unique(), ax=ax3)
     ax3.set_title("Top Device Brands in Top 5 States by Registered Users")
     ax3.set_ylabel("Total Users")
     ax3.set_xlabel("State")
     ax3.set_xticklabels(ax3.get_xticklabels(), rotation=45)
     ax3.legend(title="Brand", bbox_to_anchor=(1.05, 1), loc='upper left')
-    st.pyplot(fig3)
 
-    # --- Visualization 4: Heatmap – Brand Share by State (Normalized) ---
-    st.subheader("🌐 Device Brand Share by State (Normalized Heatmap)")
 
-    pivot_df = state_users_by_device.pivot(index='state', columns='brand', values='total_users').fillna(0)
-    normalized = pivot_df.div(pivot_df.sum(axis=1), axis=0)
+def draw_brand_share(ax4, brand_share):
+    import seaborn as sns
 
-    fig4, ax4 = plt.subplots(figsize=(14, 10))
-    sns.heatmap(normalized, cmap='YlGnBu', linewidths=0.5, linecolor='gray', ax=ax4)
+    sns.heatmap(aggregate.matrix_frame(brand_share), cmap='YlGnBu', linewidths=0.5, linecolor='gray', ax=ax4)
     ax4.set_title("Device Brand Share by State (Normalized)")
     ax4.set_xlabel("Brand")
     ax4.set_ylabel("State")
-    st.pyplot(fig4)
 
-    # --- Visualization 5: Line Chart – Quarterly Brand Usage Trend ---
-    st.subheader("📈 Quarterly Brand Usage Trend – Top Brands")
 
-    quarterly_brand_usage_trend['year_quarter'] = (
-        quarterly_brand_usage_trend['year'].astype(str) +
-        ' Q' +
-        quarterly_brand_usage_trend['quarter'].astype(str)
-    )
-
-    top_brands = ['Xiaomi', 'Samsung', 'Vivo']
-    df_trend_filtered = quarterly_brand_usage_trend[
+def top_brand_trend(quarterly_brand_usage_trend, top_brands):
+    return quarterly_brand_usage_trend[
         quarterly_brand_usage_trend['brand'].isin(top_brands)
     ]
 
-    fig5, ax5 = plt.subplots(figsize=(14, 6))
+
+def draw_brand_trend(ax5, quarterly_brand_usage_trend, top_brands):
+    import seaborn as sns
+
+    df_trend_filtered = top_brand_trend(quarterly_brand_usage_trend, top_brands)
     sns.lineplot(
         data=df_trend_filtered,
         x='year_quarter',
         y='total_registered_users',
         hue='brand',
+        hue_order=df_trend_filtered['brand'].unique(),
         marker='o',
         ax=ax5
     )
     ax5.set_title('Quarterly Brand Usage Trend (Top Brands)')
     ax5.set_xlabel('Year - Quarter')
     ax5.set_ylabel('Total Registered Users')
-    plt.xticks(rotation=45)
-    st.pyplot(fig5)
+    ax5.tick_params(axis='x', labelrotation=45)
+
 
+def run():
+    st.header("🏢 Case Study 2: Device Dominance and User Engagement")
 
+    # Load data
+    device_engagement = data.load("device_users_by_brand")
+    state_users_by_device = data.load("state_users_by_device")
+
+    with charts.parallel():
+        # --- Visualization 1: Avg. App Open % ---
+        st.subheader("📊 Avg. App Open % by Device Brand")
+        def plot_app_open():
+            sorted_df = device_engagement.sort_values(by="avg_app_open_percentage", ascending=False)
+            return plots.bar(sorted_df["brand"], sorted_df["avg_app_open_percentage"], "Avg. App Open % per Device Brand", ylabel="Avg. App Open Percentage (%)")
+        charts.pyplot("cs2.app_open", draw_app_open, (8, 5), deps=["device_users_by_brand"], rows=len(device_engagement), plot=plot_app_open, args=(device_engagement,))
+
+        # --- Visualization 2: Total Registered Users ---
+        st.subheader("👥 Total Registered Users by Brand")
+        def plot_brand_users():
+            sorted_df = device_engagement.sort_values(by="total_registered_users", ascending=False)
+            return plots.bar(sorted_df["brand"], sorted_df["total_registered_users"], "Total Registered Users per Device Brand", ylabel="Total Registered Users")
+        charts.pyplot("cs2.brand_users", draw_brand_users, (8, 5), deps=["device_users_by_brand"], rows=len(device_engagement), plot=plot_brand_users, args=(device_engagement,))
+
+        # --- Combined Bar + Line Chart ---
+        st.subheader("📊 Device Brand: Users vs. Engagement")
+        def plot_users_vs_engagement():
+            return plots.bar_line(
+                device_engagement["brand"], device_engagement["total_registered_users"], device_engagement["avg_app_open_percentage"],
+                "Device Brand: Users vs. Engagement", "Total Registered Users", "Avg. App Open %",
+            )
+        charts.pyplot("cs2.users_vs_engagement", draw_users_vs_engagement, (12, 5), deps=["device_users_by_brand"], rows=len(device_engagement), plot=plot_users_vs_engagement, args=(device_engagement,))
+
+        # Get top 5 states by total users
+        top_states = rankings.top("device_users_by_state", "total_users", 5)['state_id']
+        filtered_df = state_users_by_device[state_users_by_device['state_id'].isin(top_states)]
+        filtered_df = filtered_df.assign(state=dims.state_labels(filtered_df['state_id']))
+
+        def plot_top_states():
+            wide = filtered_df.pivot(index='state', columns='brand', values='total_users')
+            return plots.bars(wide.index, {brand: wide[brand] for brand in wide.columns}, "Top Device Brands in Top 5 States by Registered Users", xlabel="State", ylabel="Total Users")
+        charts.pyplot("cs2.top_states", draw_top_states, (12, 6), deps=["state_users_by_device"], rows=len(filtered_df), plot=plot_top_states, args=(filtered_df,))
+
+        # --- Visualization 4: Heatmap – Brand Share by State (Normalized) ---
+        st.subheader("🌐 Device Brand Share by State (Normalized Heatmap)")
+
+        brand_share = aggregate.brand_matrix(normalized=True)
+
+        def plot_brand_share():
+            return plots.heatmap(brand_share, "Device Brand Share by State (Normalized)", xlabel="Brand", ylabel="State")
+        charts.pyplot("cs2.brand_share", draw_brand_share, (14, 10), deps=["state_users_by_device"], rows=len(state_users_by_device), plot=plot_brand_share, args=(brand_share,))
+
+        # --- Visualization 5: Line Chart – Quarterly Brand Usage Trend ---
+        st.subheader("📈 Quarterly Brand Usage Trend – Top Brands")
+
+        top_brands = ['Xiaomi', 'Samsung', 'Vivo']
+
+        start, end = periods.range_slider("quarterly_brand_usage_trend")
+        quarterly_brand_usage_trend = periods.select("quarterly_brand_usage_trend", start, end)
+
+        def plot_brand_trend():
+            return plots.lines(top_brand_trend(quarterly_brand_usage_trend, top_brands), 'year_quarter', 'total_registered_users', 'brand', 'Quarterly Brand Usage Trend (Top Brands)', xlabel='Year - Quarter', ylabel='Total Registered Users')
+        charts.pyplot("cs2.brand_trend", draw_brand_trend, (14, 6), deps=["quarterly_brand_usage_trend"], params=(tuple(top_brands), start, end), rows=len(top_brand_trend(quarterly_brand_usage_trend, top_brands)), plot=plot_brand_trend, args=(quarterly_brand_usage_trend, top_brands))
+
+        brand_growth = trends.summary("brand_users").nlargest(5, "cagr")
+        insights.panel("📈 Fastest-Growing Brands (Registered Users CAGR)", brand_growth["label"], brand_growth["cagr"], percent=True)
 
     st.subheader("📱 Device Brand Insights & Actionable Recommendations")
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("### 🔍 **Key Insights from Data Analysis & Visualizations**")
-
-        st.markdown("#### **Total Registered Users per Device Brand**")
-        st.markdown("- **Xiaomi** has the highest number of registered users, followed by **Samsung**, **Vivo**, and **Oppo**.")
-        st.markdown("- These four brands account for a significant majority of PhonePe’s user base.")
-        st.markdown("- Other brands like **Realme**, **Apple**, **Motorola**, and **OnePlus** have comparatively lower user counts.")
-
-        st.markdown("#### **Device Brand vs. Engagement (Avg. App Open %)**")
-        st.markdown("- **Xiaomi** leads in both user base and highest average app open %.")
-        st.markdown("- **Samsung** and **Vivo** also show decent engagement but lag behind Xiaomi.")
-        st.markdown("- Brands like **Apple** and **Motorola** show lower engagement despite having a substantial user base.")
-        st.markdown("- Smaller brands show extremely low engagement, indicating underutilization.")
-
-        st.markdown("#### **App Open % by Device Brand**")
-        st.markdown("- **Xiaomi** leads with ~26% average app open rate, indicating high engagement.")
-        st.markdown("- **Samsung** and **Vivo** follow, with slightly lower engagement rates.")
-        st.markdown("- Brands such as **Apple**, **Motorola**, and **Huawei** exhibit low app engagement despite registrations.")
-
-        st.markdown("#### **Top Device Brands in Top 5 States by Registered Users**")
-        st.markdown("- Across top states (**Andhra Pradesh, Karnataka, Maharashtra, Rajasthan, Uttar Pradesh**), **Xiaomi** consistently leads.")
-        st.markdown("- The device brand hierarchy remains consistent across regions, with slight state-wise variations in gaps.")
-
-        st.markdown("#### **Device Brand Share by State (Heatmap)**")
-        st.markdown("- **Xiaomi** dominates most states, especially **Jammu & Kashmir**, **Punjab**, and northeastern states.")
-        st.markdown("- **Samsung** shows strong presence in **Kerala**, **Karnataka**, and **Maharashtra**.")
-        st.markdown("- **Oppo**, **Vivo**, and **Realme** have moderate, state-specific presence.")
-        st.markdown("- Premium brands like **Apple** have minimal state-wise share.")
-
-        st.markdown("#### **Quarterly Brand Usage Trend (Top Brands)**")
-        st.markdown("- **Xiaomi** shows steady, consistent growth from 2019 to 2022, maintaining its lead.")
-        st.markdown("- **Samsung** and **Vivo** also show consistent but slower growth.")
-        st.markdown("- Overall trend shows increasing smartphone penetration and PhonePe’s growing adoption.")
+        st.markdown("""
+        ### 🔍 **Key Insights from Data Analysis & Visualizations**
+
+        #### **Total Registered Users per Device Brand**
+
+        - **Xiaomi** has the highest number of registered users, followed by **Samsung**, **Vivo**, and **Oppo**.
+        - These four brands account for a significant majority of PhonePe’s user base.
+        - Other brands like **Realme**, **Apple**, **Motorola**, and **OnePlus** have comparatively lower user counts.
+
+        #### **Device Brand vs. Engagement (Avg. App Open %)**
+
+        - **Xiaomi** leads in both user base and highest average app open %.
+        - **Samsung** and **Vivo** also show decent engagement but lag behind Xiaomi.
+        - Brands like **Apple** and **Motorola** show lower engagement despite having a substantial user base.
+        - Smaller brands show extremely low engagement, indicating underutilization.
+
+        #### **App Open % by Device Brand**
+
+        - **Xiaomi** leads with ~26% average app open rate, indicating high engagement.
+        - **Samsung** and **Vivo** follow, with slightly lower engagement rates.
+        - Brands such as **Apple**, **Motorola**, and **Huawei** exhibit low app engagement despite registrations.
+
+        #### **Top Device Brands in Top 5 States by Registered Users**
+
+        - Across top states (**Andhra Pradesh, Karnataka, Maharashtra, Rajasthan, Uttar Pradesh**), **Xiaomi** consistently leads.
+        - The device brand hierarchy remains consistent across regions, with slight state-wise variations in gaps.
+
+        #### **Device Brand Share by State (Heatmap)**
+
+        - **Xiaomi** dominates most states, especially **Jammu & Kashmir**, **Punjab**, and northeastern states.
+        - **Samsung** shows strong presence in **Kerala**, **Karnataka**, and **Maharashtra**.
+        - **Oppo**, **Vivo**, and **Realme** have moderate, state-specific presence.
+        - Premium brands like **Apple** have minimal state-wise share.
+
+        #### **Quarterly Brand Usage Trend (Top Brands)**
+
+        - **Xiaomi** shows steady, consistent growth from 2019 to 2022, maintaining its lead.
+        - **Samsung** and **Vivo** also show consistent but slower growth.
+        - Overall trend shows increasing smartphone penetration and PhonePe’s growing adoption.
+        """)
 
     with col2:
-        st.markdown("### 📝 **Actionable Recommendations**")
+        st.markdown("""
+        ### 📝 **Actionable Recommendations**
+
+        #### **Maximize Engagement with High-User Brands**
+
+        - Prioritize optimizing app experience for **Xiaomi**, **Samsung**, **Vivo**, and **Oppo** users.
+        - Introduce brand-specific promotions or exclusive features (e.g., device-based UI enhancements).
 
-        st.markdown("#### **Maximize Engagement with High-User Brands**")
-        st.markdown("- Prioritize optimizing app experience for **Xiaomi**, **Samsung**, **Vivo**, and **Oppo** users.")
-        st.markdown("- Introduce brand-specific promotions or exclusive features (e.g., device-based UI enhancements).")
+        #### **Boost Engagement for Low-Engagement Brands**
 
-        st.markdown("#### **Boost Engagement for Low-Engagement Brands**")
-        st.markdown("- Investigate low engagement in brands like **Apple**, **Motorola**, and **Huawei** despite significant user registrations.")
-        st.markdown("- Optimize app compatibility, performance, and notifications for these devices.")
-        st.markdown("- Run targeted push notifications or engagement campaigns for these user segments.")
+        - Investigate low engagement in brands like **Apple**, **Motorola**, and **Huawei** despite significant user registrations.
+        - Optimize app compatibility, performance, and notifications for these devices.
+        - Run targeted push notifications or engagement campaigns for these user segments.
 
-        st.markdown("#### **State-Level Brand Targeting**")
-        st.markdown("- Design regional campaigns based on dominant brands:")
-        st.markdown("  - **North & Northeast India:** Xiaomi-focused promotions.")
-        st.markdown("  - **South India:** Balanced campaigns for Xiaomi and Samsung users.")
-        st.markdown("  - **Urban & Premium Markets:** Specialized strategies for **Apple** and **OnePlus** users.")
+        #### **State-Level Brand Targeting**
 
-        st.markdown("#### **Quarterly Tracking & Dynamic Optimization**")
-        st.markdown("- Track quarterly brand trends to detect emerging brands or declining engagement.")
-        st.markdown("- Conduct quarterly reviews to fine-tune device-specific optimizations.")
+        - Design regional campaigns based on dominant brands:
+          - **North & Northeast India:** Xiaomi-focused promotions.
+          - **South India:** Balanced campaigns for Xiaomi and Samsung users.
+          - **Urban & Premium Markets:** Specialized strategies for **Apple** and **OnePlus** users.
 
-        st.markdown("#### **In-App Personalization Based on Device Brands**")
-        st.markdown("- Use device-brand segmentation for personalized onboarding, tutorials, or feature recommendations.")
-        st.markdown("- Pre-load lighter app versions or optimize backend for low-end devices in certain brands.")
+        #### **Quarterly Tracking & Dynamic Optimization**
 
-    st.markdown("---")
+        - Track quarterly brand trends to detect emerging brands or declining engagement.
+        - Conduct quarterly reviews to fine-tune device-specific optimizations.
+
+        #### **In-App Personalization Based on Device Brands**
+
+        - Use device-brand segmentation for personalized onboarding, tutorials, or feature recommendations.
+        - Pre-load lighter app versions or optimize backend for low-end devices in certain brands.
+        """)
 
-    st.markdown("### ✅ **Conclusion**")
     st.markdown("""
+    ---
+
+    ### ✅ **Conclusion**
+
     This analysis highlights **Xiaomi’s** clear dominance in both user base and engagement metrics, making it the top priority for app optimization.
     Brands like **Samsung**, **Vivo**, and **Oppo** also remain significant contributors.
     Addressing low-engagement brands such as **Apple** and **Motorola** can unlock untapped user potential.
@@ -1,9 +1,56 @@
 # case_study_3.py
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import aggregate
+import charts
+import data
+import dims
+import insights
+import periods
+import plots
+import rankings
+import trends
+
+# ------------------ Charts ------------------
+def draw_states_amount(ax1, top_states):
+    import seaborn as sns
+
+    sns.barplot(data=top_states, y='state', x='total_insurance_amount', palette='viridis', ax=ax1)
+    ax1.set_title("Top 10 States by Insurance Transaction Amount")
+    ax1.set_xlabel("Total Insurance Amount (₹)")
+
+
+def draw_districts_amount(ax2, top_districts):
+    import seaborn as sns
+
+    sns.barplot(data=top_districts, y='district', x='total_insurance_amount', palette='rocket', ax=ax2)
+    ax2.set_title("Top 10 Districts by Insurance Transaction Amount")
+    ax2.set_xlabel("Total Insurance Amount (₹)")
+
+
+def draw_states_volume(ax3, top_states_volume):
+    import seaborn as sns
+
+    sns.barplot(data=top_states_volume, y='state', x='total_insurance_transactions', palette='cubehelix', ax=ax3)
+    ax3.set_title("Top 10 States by Insurance Transactions")
+    ax3.set_xlabel("Total Transactions")
+
+
+def draw_trend(ax4, filtered_trend):
+    import seaborn as sns
+
+    sns.lineplot(data=filtered_trend, x='year', y='total_insurance_amount', hue='state', marker='o', ax=ax4)
+    ax4.set_title("📈 Yearly Insurance Transaction Trend – Top 5 States")
+    ax4.set_ylabel("Total Insurance Amount (₹)")
+
+
+def draw_district_heatmap(ax5, district_matrix):
+    import seaborn as sns
+
+    pivot = aggregate.matrix_frame(district_matrix)
+    sns.heatmap(pivot, cmap='YlGnBu', linewidths=0.3, linecolor='gray', ax=ax5)
+    ax5.set_title("District-wise Insurance Transaction Heatmap (Top 25 Districts)")
+
 
 def run():
     st.header("🛡️ Case Study 3: Insurance Engagement Analysis")
@@ -12,138 +59,155 @@ def run():
                 "the uptake of insurance services among users. This helps identify regional behavior and growth opportunities.")
 
     # Load data
-    insurance_by_state = pd.read_csv("insurance_by_state.csv")
-    insurance_by_category = pd.read_csv("insurance_by_category.csv")
-    insurance_trend_by_state = pd.read_csv("insurance_trend_by_state.csv")
-    top_districts_insurance = pd.read_csv("top_districts_insurance.csv")
-    #state_insurance_amount = pd.read_csv("top_insurance_state.csv")
+    insurance_by_state = aggregate.insurance_by_state()
+    insurance_by_district = aggregate.insurance_by_district()
 
-    # ------------------ Charts Row 1 ------------------
-    col1, col2 = st.columns(2)
+    with charts.parallel():
+        # ------------------ Charts Row 1 ------------------
+        col1, col2 = st.columns(2)
 
-    with col1:
-        top_states = insurance_by_state.sort_values(by='total_insurance_amount', ascending=False).head(10)
-        fig1, ax1 = plt.subplots(figsize=(8,5))
-        sns.barplot(data=top_states, y='state', x='total_insurance_amount', palette='viridis', ax=ax1)
-        ax1.set_title("Top 10 States by Insurance Transaction Amount")
-        ax1.set_xlabel("Total Insurance Amount (₹)")
-        st.pyplot(fig1)
+        with col1:
+            top_states = rankings.top("insurance_by_state", "total_insurance_amount", 10)
+            top_states = top_states.assign(state=dims.state_labels(top_states['state_id']))
 
-    with col2:
-        
-        top_districts = top_districts_insurance.sort_values(by='total_insurance_amount', ascending=False).head(10)
-        fig2, ax2 = plt.subplots(figsize=(8,5))
-        sns.barplot(data=top_districts, y='district', x='total_insurance_amount', palette='rocket', ax=ax2)
-        ax2.set_title("Top 10 Districts by Insurance Transaction Amount")
-        ax2.set_xlabel("Total Insurance Amount (₹)")
-        st.pyplot(fig2)
-
-    # ------------------ Charts Row 2 ------------------
-    st.markdown("### 📊 Volume vs Value: State Insights")
-    col3, col4 = st.columns(2)
-
-    with col3:
-        top_states_volume = insurance_by_state.sort_values(by='total_insurance_transactions', ascending=False).head(10)
-        fig3, ax3 = plt.subplots(figsize=(8,5))
-        sns.barplot(data=top_states_volume, y='state', x='total_insurance_transactions', palette='cubehelix', ax=ax3)
-        ax3.set_title("Top 10 States by Insurance Transactions")
-        ax3.set_xlabel("Total Transactions")
-        st.pyplot(fig3)
-
-    with col4:
-        trend_df = insurance_trend_by_state.copy()
-        top_trend_states = trend_df.groupby('state')['total_insurance_amount'].sum().nlargest(5).index.tolist()
-        filtered_trend = trend_df[trend_df['state'].isin(top_trend_states)]
-        filtered_trend['year'] = filtered_trend['year'].astype(str)
-
-        fig4, ax4 = plt.subplots(figsize=(10,5))
-        sns.lineplot(data=filtered_trend, x='year', y='total_insurance_amount', hue='state', marker='o', ax=ax4)
-        ax4.set_title("📈 Yearly Insurance Transaction Trend – Top 5 States")
-        ax4.set_ylabel("Total Insurance Amount (₹)")
-        st.pyplot(fig4)
-
-    # ------------------ District Heatmap ------------------
-    st.markdown("### 🔥 District-Level Heatmap")
-
-    top_districts = insurance_by_category.nlargest(25, "total_insurance_transactions")
-    pivot = top_districts.pivot(index="district", columns="state", values="total_insurance_transactions").fillna(0)
-    #pivot = insurance_by_category.pivot(index='district', columns='state', values='total_insurance_transactions').fillna(0)
-    fig5, ax5 = plt.subplots(figsize=(14,10))
-    sns.heatmap(pivot, cmap='YlGnBu', linewidths=0.3, linecolor='gray', ax=ax5)
-    ax5.set_title("District-wise Insurance Transaction Heatmap (Top 25 Districts)")
-    st.pyplot(fig5)
+            def plot_states_amount():
+                return plots.bar(top_states['state'], top_states['total_insurance_amount'], "Top 10 States by Insurance Transaction Amount", xlabel="Total Insurance Amount (₹)", horizontal=True)
+            charts.pyplot("cs3.states_amount", draw_states_amount, (8,5), deps=["insurance_trend_by_state"], rows=len(insurance_by_state), plot=plot_states_amount, args=(top_states,))
 
-    # ------------------ Insights ------------------
+        with col2:
+            top_districts = rankings.top("insurance_by_district", "total_insurance_amount", 10)
+            top_districts = top_districts.assign(district=data.district_labels(top_districts['district_id']))
+
+            def plot_districts_amount():
+                return plots.bar(top_districts['district'], top_districts['total_insurance_amount'], "Top 10 Districts by Insurance Transaction Amount", xlabel="Total Insurance Amount (₹)", horizontal=True)
+            charts.pyplot("cs3.districts_amount", draw_districts_amount, (8,5), deps=["district_insurance_transactions"], rows=len(insurance_by_district), plot=plot_districts_amount, args=(top_districts,))
+
+        # ------------------ Charts Row 2 ------------------
+        st.markdown("### 📊 Volume vs Value: State Insights")
+        col3, col4 = st.columns(2)
+
+        with col3:
+            top_states_volume = rankings.top("insurance_by_state", "total_insurance_transactions", 10)
+            top_states_volume = top_states_volume.assign(state=dims.state_labels(top_states_volume['state_id']))
 
+            def plot_states_volume():
+                return plots.bar(top_states_volume['state'], top_states_volume['total_insurance_transactions'], "Top 10 States by Insurance Transactions", xlabel="Total Transactions", horizontal=True)
+            charts.pyplot("cs3.states_volume", draw_states_volume, (8,5), deps=["insurance_trend_by_state"], rows=len(insurance_by_state), plot=plot_states_volume, args=(top_states_volume,))
+
+        with col4:
+            start, end = periods.range_slider("insurance_trend_by_state")
+            insurance_trend_by_state = periods.select("insurance_trend_by_state", start, end, columns=["state", "year", "quarter", "total_insurance_amount"])
+
+            trend_df = insurance_trend_by_state
+            top_trend_states = rankings.top("insurance_by_state", "total_insurance_amount", 5)['state_id']
+            filtered_trend = trend_df[trend_df['state_id'].isin(top_trend_states)]
+            filtered_trend = filtered_trend.assign(year=filtered_trend['year'].astype(str), state=dims.state_labels(filtered_trend['state_id']))
+
+            def plot_trend():
+                # One point per (state, year), averaged over quarters like sns.lineplot's default estimator.
+                yearly = filtered_trend.groupby(['state', 'year'], sort=False, as_index=False)['total_insurance_amount'].mean()
+                return plots.lines(yearly, 'year', 'total_insurance_amount', 'state', "📈 Yearly Insurance Transaction Trend – Top 5 States", ylabel="Total Insurance Amount (₹)")
+            charts.pyplot("cs3.trend", draw_trend, (10,5), deps=["insurance_trend_by_state"], params=(start, end), rows=len(filtered_trend), plot=plot_trend, args=(filtered_trend,))
+
+            climbers = trends.summary("insurance").nlargest(5, "rank_change")
+            climbers = climbers[climbers["rank_change"] > 0]
+            if len(climbers):
+                insights.panel(f"🧗 Biggest Rank Gains in Insurance Amount (year to {trends.latest('insurance')})", climbers["label"], climbers["rank_change"])
+
+        # ------------------ District Heatmap ------------------
+        st.markdown("### 🔥 District-Level Heatmap")
+
+        district_matrix = aggregate.district_state_matrix(25)
+
+        def plot_district_heatmap():
+            return plots.heatmap(district_matrix, "District-wise Insurance Transaction Heatmap (Top 25 Districts)")
+        charts.pyplot("cs3.district_heatmap", draw_district_heatmap, (14,10), deps=["district_insurance_transactions"], rows=len(insurance_by_district), plot=plot_district_heatmap, args=(district_matrix,))
+
+    # ------------------ Insights ------------------
 
     st.subheader("🛡️ Insurance Transaction Insights & Actionable Recommendations")
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("### 🔍 **Key Insights from Data Analysis & Visualizations**")
-
-        st.markdown("#### **Top 10 States by Insurance Transaction Amount**")
-        st.markdown("- **Karnataka** and **Maharashtra** lead significantly in total insurance transaction amounts.")
-        st.markdown("- Other top states include **Uttar Pradesh**, **Tamil Nadu**, and **Kerala**.")
-        st.markdown("- Southern states (**Karnataka**, **Tamil Nadu**, **Kerala**, **Telangana**) dominate the insurance market.")
-        st.markdown("- States like **West Bengal**, **Rajasthan**, **Haryana**, and **Delhi** also rank in the top 10 but with comparatively lower amounts.")
-
-        st.markdown("#### **Top 10 States by Insurance Transaction Count**")
-        st.markdown("- **Karnataka** leads, followed by **Maharashtra** and **Tamil Nadu** in transaction count.")
-        st.markdown("- **Uttar Pradesh** shows high transaction counts but slightly lower total amounts, suggesting smaller transaction values per user.")
-        st.markdown("- Other key states: **Telangana**, **West Bengal**, **Kerala**, **Andhra Pradesh**, **Delhi**, and **Rajasthan**.")
-
-        st.markdown("#### **Top 10 Districts by Insurance Transaction Amount**")
-        st.markdown("- **Bengaluru Urban (Karnataka)** dominates by a wide margin.")
-        st.markdown("- Other high-value districts include:")
-        st.markdown("  - **Pune, Thane, Mumbai Suburban** (Maharashtra)")
-        st.markdown("  - **Chennai** (Tamil Nadu)")
-        st.markdown("  - **Medchal Malkajgiri & Rangareddy** (Telangana)")
-        st.markdown("  - **Jaipur** (Rajasthan)")
-        st.markdown("  - **Ernakulam** (Kerala)")
-        st.markdown("  - **Gurugram** (Haryana)")
-        st.markdown("- High engagement in metro/urban districts.")
-
-        st.markdown("#### **Yearly Insurance Transaction Trend – Top 5 States**")
-        st.markdown("- Strong upward trend from 2020 to 2024 across all top 5 states.")
-        st.markdown("- **Karnataka** leads in both growth rate and volume, followed by **Maharashtra** and **Tamil Nadu**.")
-        st.markdown("- Consistent growth indicates increasing insurance adoption.")
-
-        st.markdown("#### **District-wise Insurance Transaction Heatmap (Top 25 Districts)**")
-        st.markdown("- Metro/urban districts dominate: **Bengaluru Urban, Pune, Thane, Chennai, Medchal Malkajgiri, Rangareddy, Mumbai Suburban, Jaipur, Ernakulam**.")
-        st.markdown("- Minimal activity in several districts of **Uttar Pradesh**, **Bihar**, and **Madhya Pradesh**, signaling untapped potential.")
+        st.markdown("""
+        ### 🔍 **Key Insights from Data Analysis & Visualizations**
+
+        #### **Top 10 States by Insurance Transaction Amount**
+
+        - **Karnataka** and **Maharashtra** lead significantly in total insurance transaction amounts.
+        - Other top states include **Uttar Pradesh**, **Tamil Nadu**, and **Kerala**.
+        - Southern states (**Karnataka**, **Tamil Nadu**, **Kerala**, **Telangana**) dominate the insurance market.
+        - States like **West Bengal**, **Rajasthan**, **Haryana**, and **Delhi** also rank in the top 10 but with comparatively lower amounts.
+
+        #### **Top 10 States by Insurance Transaction Count**
+
+        - **Karnataka** leads, followed by **Maharashtra** and **Tamil Nadu** in transaction count.
+        - **Uttar Pradesh** shows high transaction counts but slightly lower total amounts, suggesting smaller transaction values per user.
+        - Other key states: **Telangana**, **West Bengal**, **Kerala**, **Andhra Pradesh**, **Delhi**, and **Rajasthan**.
+
+        #### **Top 10 Districts by Insurance Transaction Amount**
+
+        - **Bengaluru Urban (Karnataka)** dominates by a wide margin.
+        - Other high-value districts include:
+          - **Pune, Thane, Mumbai Suburban** (Maharashtra)
+          - **Chennai** (Tamil Nadu)
+          - **Medchal Malkajgiri & Rangareddy** (Telangana)
+          - **Jaipur** (Rajasthan)
+          - **Ernakulam** (Kerala)
+          - **Gurugram** (Haryana)
+        - High engagement in metro/urban districts.
+
+        #### **Yearly Insurance Transaction Trend – Top 5 States**
+
+        - Strong upward trend from 2020 to 2024 across all top 5 states.
+        - **Karnataka** leads in both growth rate and volume, followed by **Maharashtra** and **Tamil Nadu**.
+        - Consistent growth indicates increasing insurance adoption.
+
+        #### **District-wise Insurance Transaction Heatmap (Top 25 Districts)**
+
+        - Metro/urban districts dominate: **Bengaluru Urban, Pune, Thane, Chennai, Medchal Malkajgiri, Rangareddy, Mumbai Suburban, Jaipur, Ernakulam**.
+        - Minimal activity in several districts of **Uttar Pradesh**, **Bihar**, and **Madhya Pradesh**, signaling untapped potential.
+        """)
 
     with col2:
-        st.markdown("### 📝 **Actionable Recommendations**")
+        st.markdown("""
+        ### 📝 **Actionable Recommendations**
 
-        st.markdown("#### **Leverage High-Performing States & Districts**")
-        st.markdown("- Strengthen partnerships and expand insurance offerings in top-performing states like **Karnataka, Maharashtra, and Tamil Nadu**.")
-        st.markdown("- Launch premium insurance products or bundled services targeting high-transaction districts such as **Bengaluru Urban, Pune, and Chennai**.")
+        #### **Leverage High-Performing States & Districts**
 
-        st.markdown("#### **Target Low Adoption Regions**")
-        st.markdown("- Focus on under-penetrated yet populous regions like **Uttar Pradesh, Bihar, Rajasthan, and Madhya Pradesh** with:")
-        st.markdown("  - Affordable micro-insurance products.")
-        st.markdown("  - Simplified onboarding and vernacular language support.")
-        st.markdown("  - Awareness campaigns highlighting digital insurance benefits.")
+        - Strengthen partnerships and expand insurance offerings in top-performing states like **Karnataka, Maharashtra, and Tamil Nadu**.
+        - Launch premium insurance products or bundled services targeting high-transaction districts such as **Bengaluru Urban, Pune, and Chennai**.
 
-        st.markdown("#### **Optimize for High-Transaction but Low-Amount Regions**")
-        st.markdown("- Identify users in states like **Uttar Pradesh** with high transaction counts but lower values.")
-        st.markdown("- Offer premium upgrades or bundled plans to increase average transaction amounts.")
+        #### **Target Low Adoption Regions**
 
-        st.markdown("#### **Regional Campaign Customization**")
-        st.markdown("- Create hyperlocal marketing strategies focusing on urban vs. rural dynamics:")
-        st.markdown("  - **Urban/Metro Users:** Promote advanced plans, quick claim processes, and high-value policies.")
-        st.markdown("  - **Rural/Semi-Urban Users:** Focus on low-cost protection plans, government-linked schemes, and simplified purchase journeys.")
+        - Focus on under-penetrated yet populous regions like **Uttar Pradesh, Bihar, Rajasthan, and Madhya Pradesh** with:
+          - Affordable micro-insurance products.
+          - Simplified onboarding and vernacular language support.
+          - Awareness campaigns highlighting digital insurance benefits.
 
-        st.markdown("#### **Quarterly Monitoring & Growth Acceleration**")
-        st.markdown("- Monitor quarterly insurance trends to spot emerging markets.")
-        st.markdown("- Dynamically adjust marketing and operational strategies based on regional data.")
+        #### **Optimize for High-Transaction but Low-Amount Regions**
 
-    st.markdown("---")
+        - Identify users in states like **Uttar Pradesh** with high transaction counts but lower values.
+        - Offer premium upgrades or bundled plans to increase average transaction amounts.
+
+        #### **Regional Campaign Customization**
+
+        - Create hyperlocal marketing strategies focusing on urban vs. rural dynamics:
+          - **Urban/Metro Users:** Promote advanced plans, quick claim processes, and high-value policies.
+          - **Rural/Semi-Urban Users:** Focus on low-cost protection plans, government-linked schemes, and simplified purchase journeys.
+
+        #### **Quarterly Monitoring & Growth Acceleration**
+
+        - Monitor quarterly insurance trends to spot emerging markets.
+        - Dynamically adjust marketing and operational strategies based on regional data.
+        """)
 
-    st.markdown("### ✅ **Conclusion**")
     st.markdown("""
+    ---
+
+    ### ✅ **Conclusion**
+
     This insurance transaction analysis highlights clear regional disparities in adoption.
     While metros such as **Bengaluru Urban** and **Pune** dominate the market, many populous districts remain under-tapped.
     By leveraging targeted marketing, affordable products, and regionalized campaigns, PhonePe can unlock significant growth potential in the insurance segment.
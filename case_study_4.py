@@ -1,152 +1,172 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.graph_objects as go
+import charts
+import data
+import dims
+import plots
+import query
+import rankings
 
-def run():
-    st.header("👥 Case Study 4: User Engagement and Growth Strategy")
-
-    # 1️⃣ Top States by Total Registered Users & App Opens
-    st.subheader("📊 Registered Users vs App Opens by State")
-    state_user_summary = pd.read_csv("state_user_summary.csv")
+# ------------------ Charts ------------------
+def sorted_users(state_user_summary, ascending):
+    df_sorted = state_user_summary.sort_values("total_registered_users", ascending=ascending)
+    return df_sorted.assign(state=dims.state_labels(df_sorted['state_id']))
 
-    df_sorted = state_user_summary.sort_values("total_registered_users", ascending=True)
 
-    fig1, ax1 = plt.subplots(figsize=(12, 10))
-    sns.set_style("whitegrid")
+def draw_users_vs_opens(ax1, state_user_summary):
+    df_sorted = sorted_users(state_user_summary, ascending=True)
     ax1.barh(df_sorted['state'], df_sorted['total_registered_users'], color='green', label='Registered Users')
     ax1.barh(df_sorted['state'], df_sorted['total_app_opens'], color='salmon', alpha=0.7, label='App Opens')
     ax1.set_xlabel("User Count")
     ax1.set_title("Registered Users vs App Opens by State")
     ax1.legend()
-    st.pyplot(fig1)
 
-    st.markdown("---")
 
-    # 2️⃣ District-Wise User Summary (with Plotly Dropdown)
-    st.subheader("🌐 District-Wise Registered Users (Interactive)")
+def draw_top_districts(ax3, top10):
+    import seaborn as sns
+
+    sns.barplot(data=top10, y="label", x="total_registered_users", palette="magma", ax=ax3)
+    ax3.set_title("Top 10 Districts by Total Registered Users")
+    ax3.set_xlabel("Total Registered Users")
+    ax3.set_ylabel("District (State)")
+
 
-    district_user_summary = pd.read_csv("district_user_summary.csv")
-    states = sorted(district_user_summary['state'].unique())
-    fig2 = go.Figure()
+def run():
+    import plotly.graph_objects as go
 
-    for state in states:
-        df_state = district_user_summary[district_user_summary['state'] == state].sort_values(by='registered_users', ascending=False)
-        fig2.add_trace(go.Bar(
+    st.header("👥 Case Study 4: User Engagement and Growth Strategy")
+
+    with charts.parallel():
+        # 1️⃣ Top States by Total Registered Users & App Opens
+        st.subheader("📊 Registered Users vs App Opens by State")
+        state_user_summary = data.load("state_user_summary")
+
+        def plot_users_vs_opens():
+            df_sorted = sorted_users(state_user_summary, ascending=False)
+            return plots.bars(
+                df_sorted['state'],
+                {"Registered Users": df_sorted['total_registered_users'], "App Opens": df_sorted['total_app_opens']},
+                "Registered Users vs App Opens by State", xlabel="User Count", horizontal=True, barmode="overlay", height=800,
+            )
+        charts.pyplot("cs4.users_vs_opens", draw_users_vs_opens, (12, 10), deps=["state_user_summary"], rows=len(state_user_summary), plot=plot_users_vs_opens, args=(state_user_summary,), style="whitegrid")
+
+        st.markdown("---")
+
+        # 2️⃣ District-Wise User Summary (state picked server-side, only its districts are sent)
+        st.subheader("🌐 District-Wise Registered Users (Interactive)")
+
+        with_districts = set(query.distinct("district_user_summary", "state_id"))
+        states = [i for i in dims.STATE_IDS if i in with_districts]
+        state = st.selectbox("🌐 Choose a state:", states, format_func=dims.state_label)
+        # The state's districts in rank order, from the per-state ranking index (or the SQL backend).
+        df_state = rankings.top("district_user_summary", "registered_users", None, state_id=state)
+        df_state = df_state.assign(district=data.district_labels(df_state["district_id"]))
+
+        fig2 = go.Figure(go.Bar(
             x=df_state['registered_users'],
             y=df_state['district'],
-            name=state,
-            orientation='h',
-            visible=False
+            name=dims.state_label(state),
+            orientation='h'
         ))
+        fig2.update_layout(
+            title=f"District-wise Registered Users in {dims.state_label(state)}",
+            xaxis_title="Registered Users",
+            yaxis_title="District",
+            height=800
+        )
+        charts.plotly("cs4.districts", fig2, rows=len(df_state))
 
-    fig2.data[0].visible = True
-
-    buttons = []
-    for i, state in enumerate(states):
-        visible = [False] * len(states)
-        visible[i] = True
-        buttons.append(dict(label=state,
-                            method="update",
-                            args=[{"visible": visible},
-                                  {"title": f"District-wise Registered Users in {state}"}]))
-
-    fig2.update_layout(
-        updatemenus=[dict(
-            active=0,
-            buttons=buttons,
-            x=1.15,
-            y=1
-        )],
-        title=f"District-wise Registered Users in {states[0]}",
-        xaxis_title="Registered Users",
-        yaxis_title="District",
-        height=800
-    )
-    st.plotly_chart(fig2, use_container_width=True)
-
-    st.markdown("---")
-
-    # 3️⃣ Top Districts by Registered Users
-    st.subheader("🏆 Top 10 Districts by Total Registered Users")
-    top_district_users = pd.read_csv("top_district_uers.csv")
-
-    top_district_users = top_district_users.sort_values(by="total_registered_users", ascending=False).head(10)
-    top_district_users["label"] = top_district_users["district"] + " (" + top_district_users["state"] + ")"
-
-    fig3, ax3 = plt.subplots(figsize=(12, 8))
-    sns.barplot(data=top_district_users, y="label", x="total_registered_users", palette="magma", ax=ax3)
-    ax3.set_title("Top 10 Districts by Total Registered Users")
-    ax3.set_xlabel("Total Registered Users")
-    ax3.set_ylabel("District (State)")
-    st.pyplot(fig3)
+        st.markdown("---")
+
+        # 3️⃣ Top Districts by Registered Users
+        st.subheader("🏆 Top 10 Districts by Total Registered Users")
+        top10 = rankings.top("top_district_uers", "total_registered_users", 10)
+        top10 = top10.assign(label=data.district_labels(top10["district_id"], with_state=True))
 
+        def plot_top_districts():
+            return plots.bar(top10["label"], top10["total_registered_users"], "Top 10 Districts by Total Registered Users", xlabel="Total Registered Users", ylabel="District (State)", horizontal=True)
+        charts.pyplot("cs4.top_districts", draw_top_districts, (12, 8), deps=["top_district_uers"], rows=query.count("top_district_uers"), plot=plot_top_districts, args=(top10,), style="whitegrid")
 
     st.subheader("📱 User Engagement Insights & Actionable Recommendations")
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("### 🔍 **Key Insights from Data Analysis & Visualizations**")
-
-        st.markdown("#### **Registered Users vs. App Opens by State**")
-        st.markdown("- **Maharashtra** has the highest number of registered users and app opens, followed by **Uttar Pradesh**, **Karnataka**, **Andhra Pradesh**, and **Madhya Pradesh**.")
-        st.markdown("- States like **Bihar**, **Gujarat**, **Rajasthan**, and **Telangana** also have large user bases with moderate app engagement.")
-        st.markdown("##### Notable Observations:")
-        st.markdown("- **Bihar** and **Gujarat** show high registrations but relatively low app opens, indicating lower engagement despite large user bases.")
-        st.markdown("- Southern states like **Karnataka**, **Andhra Pradesh**, and **Telangana** show strong engagement relative to their user base.")
-
-        st.markdown("#### **District-wise User Summary (Interactive Chart)**")
-        st.markdown("- This interactive visualization allows drilling down into union territories and districts.")
-        st.markdown("- Example: **Andaman & Nicobar Islands:**")
-        st.markdown("  - Districts like **South Andaman** have higher registered users compared to others.")
-        st.markdown("- Enables focused, hyper-local analysis and strategy formulation.")
-
-        st.markdown("#### **Top 10 Districts by Total Registered Users**")
-        st.markdown("- **Bengaluru Urban (Karnataka)** leads with the highest registered users, followed by:")
-        st.markdown("  - **Pune** and **Thane** (Maharashtra)")
-        st.markdown("  - **Jaipur** (Rajasthan)")
-        st.markdown("  - **Mumbai Suburban** (Maharashtra)")
-        st.markdown("  - **Hyderabad** and **Rangareddy** (Telangana)")
-        st.markdown("  - **Ahmedabad** and **Surat** (Gujarat)")
-        st.markdown("  - **North 24 Parganas** (West Bengal)")
-        st.markdown("- Most are urban/commercial hubs, reflecting strong app adoption in metro regions.")
+        st.markdown("""
+        ### 🔍 **Key Insights from Data Analysis & Visualizations**
+
+        #### **Registered Users vs. App Opens by State**
+
+        - **Maharashtra** has the highest number of registered users and app opens, followed by **Uttar Pradesh**, **Karnataka**, **Andhra Pradesh**, and **Madhya Pradesh**.
+        - States like **Bihar**, **Gujarat**, **Rajasthan**, and **Telangana** also have large user bases with moderate app engagement.
+
+        ##### Notable Observations:
+
+        - **Bihar** and **Gujarat** show high registrations but relatively low app opens, indicating lower engagement despite large user bases.
+        - Southern states like **Karnataka**, **Andhra Pradesh**, and **Telangana** show strong engagement relative to their user base.
+
+        #### **District-wise User Summary (Interactive Chart)**
+
+        - This interactive visualization allows drilling down into union territories and districts.
+        - Example: **Andaman & Nicobar Islands:**
+          - Districts like **South Andaman** have higher registered users compared to others.
+        - Enables focused, hyper-local analysis and strategy formulation.
+
+        #### **Top 10 Districts by Total Registered Users**
+
+        - **Bengaluru Urban (Karnataka)** leads with the highest registered users, followed by:
+          - **Pune** and **Thane** (Maharashtra)
+          - **Jaipur** (Rajasthan)
+          - **Mumbai Suburban** (Maharashtra)
+          - **Hyderabad** and **Rangareddy** (Telangana)
+          - **Ahmedabad** and **Surat** (Gujarat)
+          - **North 24 Parganas** (West Bengal)
+        - Most are urban/commercial hubs, reflecting strong app adoption in metro regions.
+        """)
 
     with col2:
-        st.markdown("### 📝 **Actionable Recommendations**")
-
-        st.markdown("#### **Capitalize on High User-High Engagement States**")
-        st.markdown("- Focused marketing in **Maharashtra**, **Karnataka**, and **Andhra Pradesh** to boost user retention and cross-sell services like insurance, mutual funds, and gold.")
-        st.markdown("- Promote exclusive offers and loyalty programs in these regions.")
-
-        st.markdown("#### **Re-engagement Campaigns for Low Engagement Regions**")
-        st.markdown("- Regions like **Bihar**, **Gujarat**, and **Rajasthan** show low engagement despite large user bases.")
-        st.markdown("##### Suggested Actions:")
-        st.markdown("- Push notifications, SMS, and email campaigns to re-engage dormant users.")
-        st.markdown("- Localized in-app offers and regional language support.")
-        st.markdown("- Collaborations with local merchants to increase app utility.")
-
-        st.markdown("#### **Hyperlocal Expansion Using Interactive Dashboard Insights**")
-        st.markdown("- Utilize district-wise interactive tools to:")
-        st.markdown("  - Identify promising micro-markets within underperforming states.")
-        st.markdown("  - Launch hyperlocal campaigns in high-density but low-engagement districts.")
-        st.markdown("  - Customize marketing strategies based on district-specific performance.")
-
-        st.markdown("#### **Urban-Centric Growth Opportunities**")
-        st.markdown("- Continue leveraging high-user metros like **Bengaluru Urban**, **Pune**, **Hyderabad**, and **Mumbai Suburban**.")
-        st.markdown("- Offer premium services, early-access features, and fintech innovations to increase wallet share in these areas.")
-
-        st.markdown("#### **Enhance Data-Driven Decision Making**")
-        st.markdown("- Regularly use the interactive district-wise chart to:")
-        st.markdown("  - Monitor changes in user engagement over time.")
-        st.markdown("  - Identify emerging districts with growing traction.")
-        st.markdown("  - Optimize campaign budgets based on granular insights.")
-
-    st.markdown("---")
-
-    st.markdown("### ✅ **Conclusion**")
+        st.markdown("""
+        ### 📝 **Actionable Recommendations**
+
+        #### **Capitalize on High User-High Engagement States**
+
+        - Focused marketing in **Maharashtra**, **Karnataka**, and **Andhra Pradesh** to boost user retention and cross-sell services like insurance, mutual funds, and gold.
+        - Promote exclusive offers and loyalty programs in these regions.
+
+        #### **Re-engagement Campaigns for Low Engagement Regions**
+
+        - Regions like **Bihar**, **Gujarat**, and **Rajasthan** show low engagement despite large user bases.
+
+        ##### Suggested Actions:
+
+        - Push notifications, SMS, and email campaigns to re-engage dormant users.
+        - Localized in-app offers and regional language support.
+        - Collaborations with local merchants to increase app utility.
+
+        #### **Hyperlocal Expansion Using Interactive Dashboard Insights**
+
+        - Utilize district-wise interactive tools to:
+          - Identify promising micro-markets within underperforming states.
+          - Launch hyperlocal campaigns in high-density but low-engagement districts.
+          - Customize marketing strategies based on district-specific performance.
+
+        #### **Urban-Centric Growth Opportunities**
+
+        - Continue leveraging high-user metros like **Bengaluru Urban**, **Pune**, **Hyderabad**, and **Mumbai Suburban**.
+        - Offer premium services, early-access features, and fintech innovations to increase wallet share in these areas.
+
+        #### **Enhance Data-Driven Decision Making**
+
+        - Regularly use the interactive district-wise chart to:
+          - Monitor changes in user engagement over time.
+          - Identify emerging districts with growing traction.
+          - Optimize campaign budgets based on granular insights.
+        """)
+
     st.markdown("""
+    ---
+
+    ### ✅ **Conclusion**
+
     The user engagement analysis reveals a clear divide between high-engagement metro areas and large but under-engaged states.
     By leveraging strong metro markets and launching targeted reactivation campaigns in underperforming regions, PhonePe can significantly boost app usage and market share.
     """)
@@ -1,127 +1,197 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
+import aggregate
+import charts
+import data
+import dims
+import insights
+import periods
+import pincodes
+import plots
+import rankings
+import trends
 
 # ------------------- Case Study 5: User Registration Analysis -------------------
 
-def run():
-    # Load Data
-    state_registrations = pd.read_csv("state_registrations.csv")
-    district_registrations = pd.read_csv("district_registrations.csv")
-    pincode_registrations = pd.read_csv("pincode_registrations.csv")
-    quarterly_registrations = pd.read_csv("quarterly_registrations.csv")
-
-    # ---- 1. Top States by Total Registered Users ----
-    st.subheader("📊 Total Registered Users by State")
+# ------------------ Charts ------------------
+def sorted_states(state_registrations):
     df_sorted = state_registrations.sort_values("total_registrations", ascending=True)
+    return df_sorted.assign(state=dims.state_labels(df_sorted['state_id']))
 
-    fig1, ax1 = plt.subplots(figsize=(12, 10))
-    sns.barplot(data=df_sorted, y='state', x='total_registrations', palette="crest")
+
+def draw_states(ax1, state_registrations):
+    import seaborn as sns
+
+    df_sorted = sorted_states(state_registrations)
+    sns.barplot(data=df_sorted, y='state', x='total_registrations', palette="crest", ax=ax1)
     ax1.set_title("Total Registered Users by State")
     ax1.set_xlabel("Registered Users")
-    st.pyplot(fig1)
 
-    # ---- 2. District-wise Registered Users ----
-    st.subheader("🏙️ District-wise Registered Users (Interactive)")
-    #Sort and limit for clarity (Top 20 Districts)
-    top_districts = district_registrations.sort_values("total_registrations", ascending=False).head(20)
 
-    # Combine state & district for clarity
-    top_districts["label"] = top_districts["district"] + " (" + top_districts["state"] + ")"
+def draw_districts(ax2, top_districts):
+    import seaborn as sns
 
     # Plot Horizontal Bar Chart
-    fig2, ax2 = plt.subplots(figsize=(12, 10))
-    sns.barplot(data=top_districts, x="total_registrations", y="label", palette="magma")
+    sns.barplot(data=top_districts, x="total_registrations", y="label", palette="magma", ax=ax2)
 
     ax2.set_title("Top 20 Districts by Total User Registrations")
     ax2.set_xlabel("Total Registrations")
     ax2.set_ylabel("District (State)")
-    st.pyplot(fig2)
 
-    # ---- 3. Top 10 Pin Codes by Registered Users ----
-    st.subheader("📌 Top 10 Pin Codes by Registered Users")
-    top10_pincodes = pincode_registrations.sort_values(by="registered_users", ascending=False).head(10)
 
-    fig3, ax3 = plt.subplots(figsize=(10, 6))
-    sns.barplot(data=top10_pincodes, y='pincode', x='registered_users', palette="magma")
+def draw_pincodes(ax3, top10_pincodes):
+    import seaborn as sns
+
+    sns.barplot(data=top10_pincodes, y='pincode', x='registered_users', palette="magma", ax=ax3)
     ax3.set_title("Top 10 Pin Codes by Registered Users")
     ax3.set_xlabel("Registered Users")
-    st.pyplot(fig3)
 
-    # ---- 4. Quarterly User Registration Trend (All States) ----
-    st.subheader("📈 Quarterly User Registration Trends (All States)")
-    quarterly_registrations['year_quarter'] = quarterly_registrations['year'].astype(str) + ' Q' + quarterly_registrations['quarter'].astype(str)
 
-    plt.figure(figsize=(14, 8))
-    sns.lineplot(data=quarterly_registrations, x='year_quarter', y='total_registrations', hue='state', marker='o')
-    plt.title("Quarterly User Registration Trends (All States)")
-    plt.xlabel("Quarter")
-    plt.ylabel("Total Registrations")
-    plt.xticks(rotation=45)
-    plt.legend(title='State', bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.tight_layout()
-    st.pyplot(plt)
+def quarterly_by_state(quarterly_registrations):
+    return quarterly_registrations.assign(state=dims.state_labels(quarterly_registrations['state_id']))
 
 
+def draw_quarterly(ax4, quarterly_registrations):
+    import seaborn as sns
+
+    quarterly = quarterly_by_state(quarterly_registrations)
+    sns.lineplot(data=quarterly, x='year_quarter', y='total_registrations', hue='state', marker='o', ax=ax4)
+    ax4.set_title("Quarterly User Registration Trends (All States)")
+    ax4.set_xlabel("Quarter")
+    ax4.set_ylabel("Total Registrations")
+    ax4.tick_params(axis='x', labelrotation=45)
+    ax4.legend(title='State', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax4.figure.tight_layout()
+
+
+def run():
+    # Load Data
+    state_registrations = aggregate.state_registrations()
+    district_registrations = aggregate.district_registrations()
+    pincode_registrations = data.load("pincode_registrations")
+
+    with charts.parallel():
+        # ---- 1. Top States by Total Registered Users ----
+        st.subheader("📊 Total Registered Users by State")
+        def plot_states():
+            df_sorted = sorted_states(state_registrations)
+            return plots.bar(df_sorted['state'], df_sorted['total_registrations'], "Total Registered Users by State", xlabel="Registered Users", horizontal=True, height=800)
+        charts.pyplot("cs5.states", draw_states, (12, 10), deps=["quarterly_registrations"], rows=len(state_registrations), plot=plot_states, args=(state_registrations,))
+
+        # ---- 2. District-wise Registered Users ----
+        st.subheader("🏙️ District-wise Registered Users (Interactive)")
+        #Sort and limit for clarity (Top 20 Districts)
+        top_districts = rankings.top("district_registrations", "total_registrations", 20)
+
+        # Combine state & district for clarity
+        top_districts = top_districts.assign(label=data.district_labels(top_districts["district_id"], with_state=True))
+
+        def plot_districts():
+            return plots.bar(top_districts["label"], top_districts["total_registrations"], "Top 20 Districts by Total User Registrations", xlabel="Total Registrations", ylabel="District (State)", horizontal=True, height=700)
+        charts.pyplot("cs5.districts", draw_districts, (12, 10), deps=["district_user_summary"], rows=len(district_registrations), plot=plot_districts, args=(top_districts,))
+
+        # ---- 3. Top 10 Pin Codes by Registered Users ----
+        st.subheader("📌 Top 10 Pin Codes by Registered Users")
+        top10_pincodes = rankings.top("pincode_registrations", "registered_users", 10)
+
+        def plot_pincodes():
+            return plots.bar(top10_pincodes['pincode'].astype(str), top10_pincodes['registered_users'], "Top 10 Pin Codes by Registered Users", xlabel="Registered Users", horizontal=True)
+        charts.pyplot("cs5.pincodes", draw_pincodes, (10, 6), deps=["pincode_registrations"], rows=len(pincode_registrations), plot=plot_pincodes, args=(top10_pincodes,))
+
+        # Drill-down through the pincode -> state lookup (see pincodes.py).
+        if pincodes.available():
+            st.subheader("🗺️ Pin Code Registrations by State")
+            if not pincodes.with_districts():
+                st.caption("Pin codes are placed by state only: the pin code lookup has no district mapping (`python ingest.py pincodes <directory.csv>` adds one).")
+            by_state = pincodes.rollup("pincode_registrations", "registered_users", "state_id")
+            state = st.selectbox("📍 Drill into a state:", by_state["state_id"].tolist(), format_func=dims.state_label)
+            state_pincodes = pincodes.rollup("pincode_registrations", "registered_users", "pincode", 5, state_id=state)
+            insights.panel(f"📌 Top 5 Pin Codes in {dims.state_label(state)}", state_pincodes["pincode"], state_pincodes["registered_users"])
+
+        # ---- 4. Quarterly User Registration Trend (All States) ----
+        st.subheader("📈 Quarterly User Registration Trends (All States)")
+        start, end = periods.range_slider("quarterly_registrations")
+        quarterly_registrations = periods.select("quarterly_registrations", start, end)
+
+        def plot_quarterly():
+            # 36 series: WebGL traces keep hover and zoom responsive in the browser.
+            return plots.lines(quarterly_by_state(quarterly_registrations), 'year_quarter', 'total_registrations', 'state', "Quarterly User Registration Trends (All States)", xlabel="Quarter", ylabel="Total Registrations", webgl=True, height=700)
+        charts.pyplot("cs5.quarterly", draw_quarterly, (14, 8), deps=["quarterly_registrations"], params=(start, end), rows=len(quarterly_registrations), plot=plot_quarterly, args=(quarterly_registrations,))
+
+        registration_growth = trends.summary("registrations").nlargest(5, "yoy")
+        insights.panel(f"📈 Fastest Registration Growth (YoY, {trends.latest('registrations')})", registration_growth["label"], registration_growth["yoy"], percent=True)
+
     st.subheader("📈 User Registration Insights & Actionable Recommendations")
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("### 🔍 **Key Insights from Data Analysis & Visualizations**")
+        st.markdown("""
+        ### 🔍 **Key Insights from Data Analysis & Visualizations**
 
-        st.markdown("#### **Total User Registrations by State**")
-        st.markdown("- **Maharashtra**, **Uttar Pradesh**, **Karnataka**, and **Andhra Pradesh** are the top states with the highest user registrations.")
-        st.markdown("- These four states collectively dominate user registration volumes.")
-        st.markdown("- Other significant contributors include **Rajasthan**, **West Bengal**, **Telangana**, and **Tamil Nadu**.")
+        #### **Total User Registrations by State**
 
-        st.markdown("#### **Top 20 Districts by Total User Registrations**")
-        st.markdown("- **Bengaluru Urban (Karnataka)** leads by a large margin, followed by:")
-        st.markdown("  - **Pune**, **Thane**, **Jaipur**, and **Mumbai Suburban**.")
-        st.markdown("- Districts from **Maharashtra**, **Telangana**, and **Gujarat** are also prominent.")
-        st.markdown("- Urban districts dominate, showing a strong link between urbanization and app registrations.")
+        - **Maharashtra**, **Uttar Pradesh**, **Karnataka**, and **Andhra Pradesh** are the top states with the highest user registrations.
+        - These four states collectively dominate user registration volumes.
+        - Other significant contributors include **Rajasthan**, **West Bengal**, **Telangana**, and **Tamil Nadu**.
 
-        st.markdown("#### **Top 20 Pincodes by Total User Registrations**")
-        st.markdown("- Pincodes from metro cities show exceptionally high registration numbers.")
-        st.markdown("- Frequent appearances of pincodes from **Karnataka**, **Maharashtra**, **Gujarat**, and **Uttar Pradesh**.")
-        st.markdown("- Indicates highly localized adoption in dense urban and semi-urban pockets.")
+        #### **Top 20 Districts by Total User Registrations**
 
-        st.markdown("#### **Quarterly User Registration Trends – Top States**")
-        st.markdown("- **Maharashtra** and **Uttar Pradesh** show strong, consistent growth across quarters.")
-        st.markdown("- **Karnataka**, **Andhra Pradesh**, and **Rajasthan** also show steady upward trends.")
-        st.markdown("- Other states with smaller bases are also showing gradual growth patterns.")
+        - **Bengaluru Urban (Karnataka)** leads by a large margin, followed by:
+          - **Pune**, **Thane**, **Jaipur**, and **Mumbai Suburban**.
+        - Districts from **Maharashtra**, **Telangana**, and **Gujarat** are also prominent.
+        - Urban districts dominate, showing a strong link between urbanization and app registrations.
+
+        #### **Top 20 Pincodes by Total User Registrations**
+
+        - Pincodes from metro cities show exceptionally high registration numbers.
+        - Frequent appearances of pincodes from **Karnataka**, **Maharashtra**, **Gujarat**, and **Uttar Pradesh**.
+        - Indicates highly localized adoption in dense urban and semi-urban pockets.
+
+        #### **Quarterly User Registration Trends – Top States**
+
+        - **Maharashtra** and **Uttar Pradesh** show strong, consistent growth across quarters.
+        - **Karnataka**, **Andhra Pradesh**, and **Rajasthan** also show steady upward trends.
+        - Other states with smaller bases are also showing gradual growth patterns.
+        """)
 
     with col2:
-        st.markdown("### 📝 **Actionable Recommendations**")
+        st.markdown("""
+        ### 📝 **Actionable Recommendations**
+
+        #### **Focus on High-Growth States & Districts**
+
+        - Prioritize **Maharashtra**, **Uttar Pradesh**, **Karnataka**, **Andhra Pradesh**, and **Rajasthan** for targeted campaigns.
+        - Deepen penetration in fast-growing districts like **Bengaluru Urban**, **Pune**, **Jaipur**, and **Hyderabad** via customized offers and partnerships.
 
-        st.markdown("#### **Focus on High-Growth States & Districts**")
-        st.markdown("- Prioritize **Maharashtra**, **Uttar Pradesh**, **Karnataka**, **Andhra Pradesh**, and **Rajasthan** for targeted campaigns.")
-        st.markdown("- Deepen penetration in fast-growing districts like **Bengaluru Urban**, **Pune**, **Jaipur**, and **Hyderabad** via customized offers and partnerships.")
+        #### **Leverage Top Performing Pincodes**
 
-        st.markdown("#### **Leverage Top Performing Pincodes**")
-        st.markdown("- Launch hyper-local campaigns in top-performing pincodes within metro cities.")
-        st.markdown("- Offer rewards, cashback, or exclusive perks to boost engagement in these high-density areas.")
+        - Launch hyper-local campaigns in top-performing pincodes within metro cities.
+        - Offer rewards, cashback, or exclusive perks to boost engagement in these high-density areas.
 
-        st.markdown("#### **Expand in Underpenetrated but Growing Regions**")
-        st.markdown("- Focus on growing states like **Telangana**, **West Bengal**, and **Tamil Nadu** with region-specific strategies.")
-        st.markdown("- Use vernacular promotions and partner with local merchants to improve adoption.")
+        #### **Expand in Underpenetrated but Growing Regions**
 
-        st.markdown("#### **Monitor Urban-Rural Growth Gaps**")
-        st.markdown("- Explore suburban and semi-rural areas near high-performing districts to tap into emerging markets.")
+        - Focus on growing states like **Telangana**, **West Bengal**, and **Tamil Nadu** with region-specific strategies.
+        - Use vernacular promotions and partner with local merchants to improve adoption.
 
-        st.markdown("#### **Use Quarterly Trends for Campaign Timing**")
-        st.markdown("- Align new user acquisition campaigns with quarters showing historically high growth (e.g., festive or financial quarters).")
-        st.markdown("- Introduce referral programs and onboarding bonuses during these periods.")
+        #### **Monitor Urban-Rural Growth Gaps**
 
-        st.markdown("#### **Product Optimization Based on Insights**")
-        st.markdown("- Optimize app UI/UX for regional languages, local transaction patterns, and varying digital literacy levels in high-growth regions.")
+        - Explore suburban and semi-rural areas near high-performing districts to tap into emerging markets.
 
-    st.markdown("---")
+        #### **Use Quarterly Trends for Campaign Timing**
+
+        - Align new user acquisition campaigns with quarters showing historically high growth (e.g., festive or financial quarters).
+        - Introduce referral programs and onboarding bonuses during these periods.
+
+        #### **Product Optimization Based on Insights**
+
+        - Optimize app UI/UX for regional languages, local transaction patterns, and varying digital literacy levels in high-growth regions.
+        """)
 
-    st.markdown("### ✅ **Conclusion**")
     st.markdown("""
+    ---
+
+    ### ✅ **Conclusion**
+
     The analysis reveals that **Maharashtra**, **Uttar Pradesh**, and **Karnataka** are leading states in user registrations, along with key districts like **Bengaluru Urban** and **Pune**.
     Most registrations are concentrated in urban regions, with consistent growth across quarters.
     This indicates strong urban adoption and emerging opportunities in other regions that can be unlocked with targeted strategies and localized initiatives.
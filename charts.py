@@ -0,0 +1,244 @@
+# charts.py
+# Render cache for matplotlib/seaborn charts: each chart is rasterized once per
+# (chart id, dataset versions, widget values) and the encoded bytes are reused
+# by every later rerun and session. Every chart, cached or not, also reports
+# its render time, rows and bytes to metrics.
+
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import streamlit as st
+
+import data
+import metrics
+import render
+
+# "matplotlib" rasterizes charts on the server; "plotly" sends the data and
+# draws in the browser. The sidebar picker in app.py overrides it per session.
+RENDERERS = ("matplotlib", "plotly")
+DEFAULT_RENDERER = os.environ.get("PHONEPE_RENDERER", "matplotlib")
+
+# Upper bound on the encoded bytes kept in memory; least recently used charts go first.
+MAX_CACHE_BYTES = int(os.environ.get("PHONEPE_CHART_CACHE_MB", "64")) * 1024 * 1024
+
+# Plotly payloads are sized by serializing the figure a second time, so only one
+# render in PLOTLY_BYTES_SAMPLE per chart (the first, then every Nth) is sized.
+PLOTLY_BYTES_SAMPLE = max(1, int(os.environ.get("PHONEPE_PLOTLY_BYTES_SAMPLE", "10")))
+
+# Worker processes for charts.parallel(). 0 (the default) draws every chart in
+# the script thread. Workers stay opt-in: each keeps its own pandas, matplotlib
+# and seaborn resident for the life of the app, and once the render cache is
+# warm almost every chart is a hit that no worker sees. Enable them (one per
+# spare core) where cold renders dominate, e.g. export.py or frequent data
+# refreshes.
+RENDER_WORKERS = int(os.environ.get("PHONEPE_RENDER_WORKERS", "0"))
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+_plotly_renders = Counter()
+
+# Set by capture(): encoded charts are also appended here, in render order.
+_captured = None
+
+_pool = None
+_pool_lock = threading.Lock()
+_batch = threading.local()  # pending parallel renders of the current script run
+
+
+def _get(key):
+    with _lock:
+        image = _cache.get(key)
+        if image is not None:
+            _cache.move_to_end(key)
+        return image
+
+
+def _put(key, image):
+    global _cache_bytes
+    if len(image) > MAX_CACHE_BYTES:
+        return
+    with _lock:
+        if key in _cache:
+            return
+        _cache[key] = image
+        _cache_bytes += len(image)
+        while _cache_bytes > MAX_CACHE_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+
+def clear():
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+# Collect (chart, fmt, bytes) for every image chart rendered inside the block,
+# for the static export (export.py).
+@contextmanager
+def capture():
+    global _captured
+    _captured = []
+    try:
+        yield _captured
+    finally:
+        _captured = None
+
+
+# ------------------ Parallel rendering ------------------
+# Workers come from the standard "forkserver" start method. The server preloads
+# render.py, the pages and the plotting libraries once, and each worker is
+# forked from it. Like any spawn or forkserver child, a worker imports the
+# parent's __main__ as __mp_main__; under Streamlit that is the running script,
+# so app.py and the AppTest scripts (pages.script) keep the page behind
+# `if __name__ == "__main__"`.
+PRELOAD = ["render", "pages", "matplotlib.figure", "seaborn"]
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            mp_context = multiprocessing.get_context("forkserver")
+            mp_context.set_forkserver_preload(PRELOAD)
+            _pool = ProcessPoolExecutor(RENDER_WORKERS, mp_context=mp_context)
+        return _pool
+
+
+# Stop the worker processes (a no-op if none were started). Processes that exit
+# through multiprocessing, like export.py's page workers, must call this first.
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+# A worker died (out of memory, killed): the pool is unusable for good, so it is
+# dropped and the next parallel miss starts a fresh one.
+def _discard(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parallel(draw):
+    return getattr(_batch, "pending", None) is not None and "<locals>" not in draw.__qualname__
+
+
+# Inside the block, a cache miss whose `draw` is a module-level function (so it
+# can be pickled together with its `args`, the data slice it plots) is encoded
+# in a worker process; this is why the case studies define their draw functions
+# at module level and pass the data in rather than closing over it. Its place on
+# the page is reserved with st.empty() and filled when the result arrives;
+# nested functions cannot be pickled and stay inline. With RENDER_WORKERS at 0
+# the block changes nothing.
+@contextmanager
+def parallel():
+    if RENDER_WORKERS < 1 or getattr(_batch, "pending", None) is not None:
+        yield
+        return
+    _batch.pending = pending = {}
+    try:
+        yield
+    finally:
+        _batch.pending = None
+    for future in as_completed(pending):
+        pool, slot, key, chart, fmt, start, rows, captured, draw, figsize, args, style = pending[future]
+        try:
+            image = future.result()
+        except BrokenProcessPool:
+            _discard(pool)
+            image = render.encode(draw, figsize, fmt, args, style)
+        _put(key, image)
+        if captured is not None:
+            captured[2] = image
+        _show(slot, image, fmt)
+        _record(chart, start, rows, len(image), "miss")
+
+
+# ------------------ Instrumentation ------------------
+# Every chart reports its render time (labelled by cache hit/miss), the rows it
+# was drawn from and the bytes sent to the client (if sized); see metrics.HISTOGRAMS.
+def _record(chart, start, rows, size, cache):
+    metrics.observe("phonepe_chart_render_seconds", time.perf_counter() - start, chart=chart, cache=cache)
+    if rows is not None:
+        metrics.observe("phonepe_chart_rows", rows, chart=chart)
+    if size is not None:
+        metrics.observe("phonepe_chart_bytes", size, chart=chart)
+
+
+# ------------------ Public API ------------------
+def renderer():
+    return st.session_state.get("renderer", DEFAULT_RENDERER)
+
+
+def _show(container, image, fmt):
+    metrics.count("chart_bytes", len(image))
+    if fmt == "svg":
+        container.image(image.decode("utf-8"), width="stretch")
+    else:
+        container.image(image, width="stretch")
+
+
+# Show the chart drawn by `draw(ax, *args)`, reusing cached bytes when possible.
+# `deps` names the datasets the chart reads (their versions are part of the key)
+# and `params` holds the widget values it depends on; both must be hashable.
+# `rows` is the number of input rows the chart is drawn from and `style` an
+# optional seaborn style for this chart alone. With the Plotly renderer,
+# `plot()` builds the figure instead and nothing is rasterized.
+def pyplot(chart, draw, figsize, deps=(), params=(), fmt="png", rows=None, plot=None, args=(), style=None):
+    if plot is not None and renderer() == "plotly":
+        plotly(chart, plot(), rows=rows)
+        return
+    start = time.perf_counter()
+    key = (chart, tuple((name, data.version(name)) for name in deps), params, figsize, fmt, style)
+    image = _get(key)
+    if image is None and _parallel(draw):
+        pool = _executor()
+        try:
+            future = pool.submit(render.encode, draw, figsize, fmt, args, style)
+        except BrokenProcessPool:
+            _discard(pool)  # drawn inline below
+        else:
+            captured = [chart, fmt, None] if _captured is not None else None
+            if captured is not None:
+                _captured.append(captured)
+            _batch.pending[future] = (pool, st.empty(), key, chart, fmt, start, rows, captured, draw, figsize, args, style)
+            return
+    cache = "hit"
+    if image is None:
+        image = render.encode(draw, figsize, fmt, args, style)
+        _put(key, image)
+        cache = "miss"
+    if _captured is not None:
+        _captured.append((chart, fmt, image))
+    _show(st, image, fmt)
+    _record(chart, start, rows, len(image), cache)
+
+
+# Show a Plotly figure. Plotly charts are drawn in the browser, so the bytes sent
+# are the figure's JSON spec; it is sized on a sample of renders, after the
+# render is timed.
+def plotly(chart, fig, rows=None):
+    start = time.perf_counter()
+    st.plotly_chart(fig, width="stretch")
+    _record(chart, start, rows, None, "none")
+    with _lock:
+        sampled = _plotly_renders[chart] % PLOTLY_BYTES_SAMPLE == 0
+        _plotly_renders[chart] += 1
+    if sampled:
+        metrics.observe("phonepe_chart_bytes", len(fig.to_json()), chart=chart)
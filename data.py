@@ -0,0 +1,304 @@
+# data.py
+# Shared data-access layer: every dataset is parsed once per process and the
+# resulting frame is shared (read-only) by all sessions until its file changes.
+# With PHONEPE_SHM=1 it is parsed once per node instead (see Shared memory).
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+import dims
+import metrics
+
+DATA_DIR = os.environ.get("PHONEPE_DATA_DIR", ".")
+# Typed columnar copies written by ingest.py; preferred over the CSVs when present.
+COLUMNAR_DIR = os.path.join(DATA_DIR, "columnar")
+
+# Dimension columns held as categoricals in memory and dictionary-encoded in the
+# columnar files: each distinct spelling is stored once, rows hold small codes.
+CATEGORICAL = ("state", "district", "brand", "transaction_type")
+
+# Integer columns that are keys rather than counts. Every other int64 column is a
+# count and is kept in the narrowest integer type that holds its values.
+KEYS = ("year", "quarter", "pincode")
+
+# ------------------ Schemas ------------------
+# Column -> dtype for every base dataset, so pandas never has to infer types.
+# Rollups of these facts are derived in aggregate.py rather than stored.
+SCHEMAS = {
+    "device_users_by_brand": {"brand": "str", "total_registered_users": "int64", "avg_app_open_percentage": "float64"},
+    "district_insurance_transactions": {"state": "str", "district": "str", "total_transactions": "int64", "total_amount": "float64"},
+    "district_user_summary": {"state": "str", "district": "str", "registered_users": "int64"},
+    "insurance_trend_by_state": {"state": "str", "year": "int64", "quarter": "int64", "total_insurance_transactions": "int64", "total_insurance_amount": "int64"},
+    "pincode_registrations": {"pincode": "int64", "registered_users": "int64"},
+    "quarterly_brand_usage_trend": {"year": "int64", "quarter": "int64", "brand": "str", "total_registered_users": "int64"},
+    "quarterly_registrations": {"state": "str", "year": "int64", "quarter": "int64", "total_registrations": "int64"},
+    "quarterly_state_transaction": {"state": "str", "year": "int64", "quarter": "int64", "total_transactions": "int64", "total_amount": "float64"},
+    "state_user_summary": {"state": "str", "total_registered_users": "int64", "total_app_opens": "int64"},
+    "state_users_by_device": {"state": "str", "brand": "str", "total_users": "int64"},
+    "top_district_uers": {"state": "str", "district": "str", "total_registered_users": "int64"},
+    "top_insurance_pincode": {"state": "str", "pincode": "str", "year": "int64", "quarter": "int64", "rank": "Int64", "count": "int64", "amount": "int64"},
+    "transactions_by_state_category": {"state": "str", "transaction_type": "str", "total_transactions": "int64", "total_amount": "float64"},
+}
+
+
+def path(name):
+    return os.path.join(DATA_DIR, f"{name}.csv")
+
+
+def columnar_path(name):
+    return os.path.join(COLUMNAR_DIR, f"{name}.feather")
+
+
+# Modification time of `file` in ns, -1 if it does not exist. Used as the version
+# of any file a cache is keyed on, here and in modules with their own derived
+# files (query.py's database, pincodes.py's lookup).
+def mtime(file):
+    try:
+        return os.stat(file).st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+def _source(name):
+    # Use the columnar file unless the CSV has been edited since it was ingested.
+    csv_mtime, columnar_mtime = mtime(path(name)), mtime(columnar_path(name))
+    if columnar_mtime >= csv_mtime:
+        return columnar_path(name), columnar_mtime
+    if csv_mtime < 0:
+        raise FileNotFoundError(path(name))
+    return path(name), csv_mtime
+
+
+# Quarters appended by `ingest.py append` live next to the base file as one
+# Feather file per (year, quarter): columnar/<name>/<year>Q<quarter>.feather.
+def partition_dir(name):
+    return os.path.join(COLUMNAR_DIR, name)
+
+
+def partition_path(name, year, quarter):
+    return os.path.join(partition_dir(name), f"{year}Q{quarter}.feather")
+
+
+def parts(name):
+    # Base file first, then appended partitions in period order.
+    try:
+        files = sorted(file for file in os.listdir(partition_dir(name)) if file.endswith(".feather"))
+    except FileNotFoundError:
+        files = []
+    partitions = [os.path.join(partition_dir(name), file) for file in files]
+    return (_source(name),) + tuple((partition, mtime(partition)) for partition in partitions)
+
+
+def version(name):
+    # The (file, mtime) of every part doubles as the dataset version: rewriting
+    # the base file or appending a quarter bumps it, nothing else does.
+    return parts(name)
+
+
+# ------------------ Loading ------------------
+def read_csv(name, columns=None, file=None):
+    schema = SCHEMAS[name]
+    return pd.read_csv(file or path(name), usecols=list(columns or schema), dtype=schema, na_values=["NULL"], keep_default_na=False)
+
+
+def _read_columnar(name, source, columns=None):
+    schema = SCHEMAS[name]
+    # memory_map avoids copying the file into Python memory; only the projected columns are touched.
+    table = feather.read_table(source, columns=list(columns) if columns else None, memory_map=True)
+    df = table.to_pandas()
+    return df.astype({column: schema[column] for column in df.columns if column not in CATEGORICAL})
+
+
+def _read_raw(name, source, columns=None):
+    with metrics.phase("parse"):
+        if source.endswith(".feather"):
+            return _read_columnar(name, source, columns)
+        return read_csv(name, columns)
+
+
+# Frames stay cached for the life of the process, so they are kept compact:
+# categorical dimensions and narrowed counts. Sums and groupbys over a narrowed
+# column still accumulate in int64. Amounts stay float64, since float32 cannot
+# hold them to the rupee.
+def compact(df):
+    columns = {}
+    for column in df.columns:
+        dtype = df[column].dtype
+        if column in CATEGORICAL and not isinstance(dtype, pd.CategoricalDtype):
+            columns[column] = df[column].astype("category")
+        elif column not in KEYS and dtype == np.int64:
+            columns[column] = pd.to_numeric(df[column], downcast="integer")
+    return df.assign(**columns) if columns else df
+
+
+# One cached frame per part, so appending a quarter only reads the new partition.
+@st.cache_resource(show_spinner=False, max_entries=8 * len(SCHEMAS))
+def _read_part(name, source, mtime, columns=None, district_sources=None):
+    df = _read_raw(name, source, columns)
+    # Integer dimension keys, so filters and joins compare ints instead of spellings.
+    if "state" in df:
+        df = df.assign(state_id=dims.state_ids(df["state"]))
+        if "district" in df:
+            df = df.assign(district_id=dims.district_ids(_districts(district_sources), df["state_id"], df["district"]))
+    return compact(df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4 * len(SCHEMAS))
+def _read(name, parts, columns=None, district_sources=None):
+    frames = [_read_part(name, source, mtime, columns, district_sources) for source, mtime in parts]
+    # Parts may differ in categories and count widths; compact() re-narrows the union.
+    return frames[0] if len(frames) == 1 else compact(pd.concat(frames, ignore_index=True))
+
+
+def _load(name, columns=None):
+    district_sources = dims_version(name) if "district" in (columns or SCHEMAS[name]) else None
+    return _read(name, parts(name), tuple(columns) if columns else None, district_sources)
+
+
+# Frames are shared across sessions: derive new frames, never mutate the returned one.
+# `columns` projects the read down to the columns a chart actually needs.
+def load(name, columns=None):
+    if SHM:
+        df = _attach(name, _shm_key(name), mtime(shm_path(name)), _with_ids(columns))
+        if df is not None:
+            return df
+    return _load(name, columns)
+
+
+# A single stored part of `name` (an element of parts(name)), for incremental rollups.
+def load_part(name, part):
+    # A published dataset is published whole, so only a single-part one can stand in for its part.
+    if SHM and parts(name) == (part,):
+        df = _attach(name, _shm_key(name), mtime(shm_path(name)))
+        if df is not None:
+            return df
+    return _read_part(name, *part, None, dims_version(name))
+
+
+# ------------------ Dimensions ------------------
+DISTRICT_DATASETS = tuple(name for name, schema in SCHEMAS.items() if "district" in schema)
+
+
+def _district_sources():
+    return tuple((name, *_source(name)) for name in DISTRICT_DATASETS)
+
+
+# District ids depend on every district dataset, so they are part of the cache key
+# of anything built from `name`'s district_id column.
+def dims_version(name):
+    return _district_sources() if "district" in SCHEMAS[name] else None
+
+
+# Version of the district dimension itself, for anything keyed on districts().
+def districts_version():
+    return _district_sources()
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _districts(district_sources):
+    return dims.build_districts([_read_raw(name, source, ("state", "district")) for name, source, _ in district_sources])
+
+
+# District dimension: district_id -> state_id, normalized name and display labels.
+def districts():
+    if SHM:
+        df = _attach("districts", _districts_key(), mtime(shm_path("districts")))
+        if df is not None:
+            return df
+    return _districts(_district_sources())
+
+
+def district_labels(ids, with_state=False):
+    column = "label_with_state" if with_state else "label"
+    return districts()[column].to_numpy()[np.asarray(ids)]
+
+
+# ------------------ Shared memory ------------------
+# `python ingest.py shm` loads every dataset once and publishes it, already typed,
+# compacted and keyed, as an uncompressed Arrow IPC file in SHM_DIR (a tmpfs),
+# together with the district dimension. Processes started with PHONEPE_SHM=1
+# memory-map those files instead of parsing their own copy: numeric and string
+# columns are views of the same physical pages in every process; only the
+# categorical codes and nullable integers are copied. A published file is
+# used only while it was built from the current version of its sources;
+# otherwise load() falls back to reading them itself.
+SHM = os.environ.get("PHONEPE_SHM") == "1"
+SHM_DIR = os.environ.get("PHONEPE_SHM_DIR", "/dev/shm/phonepe")
+
+# Schema metadata key holding the source version a published file was built from.
+_VERSION_KEY = b"phonepe.version"
+
+
+def shm_path(name):
+    return os.path.join(SHM_DIR, f"{name}.arrow")
+
+
+def _shm_key(name):
+    return repr((version(name), dims_version(name))).encode()
+
+
+def _districts_key():
+    return repr(_district_sources()).encode()
+
+
+def _with_ids(columns):
+    # A projection of a published frame keeps the id columns _read_part derives from it.
+    if not columns:
+        return None
+    ids = ("state_id",) if "state" in columns else ()
+    ids += ("district_id",) if "state" in columns and "district" in columns else ()
+    return tuple(columns) + ids
+
+
+def _published_key(name):
+    try:
+        with pa.memory_map(shm_path(name)) as source:
+            return (pa.ipc.open_file(source).schema.metadata or {}).get(_VERSION_KEY)
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+
+
+# `published` is the file's mtime: a re-published file is mapped afresh, and
+# the mapping of the file it replaced stays valid for frames still using it.
+@st.cache_resource(show_spinner=False, max_entries=4 * len(SCHEMAS))
+def _attach(name, key, published, columns=None):
+    if published < 0:
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(shm_path(name)))
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    if (reader.schema.metadata or {}).get(_VERSION_KEY) != key:
+        return None
+    table = reader.read_all()
+    if columns:
+        table = table.select(list(columns))
+    # split_blocks keeps each column on its own buffer instead of consolidating (copying) them.
+    return table.to_pandas(split_blocks=True)
+
+
+def _publish(name, df, key):
+    os.makedirs(SHM_DIR, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, _VERSION_KEY: key})
+    # Write next to the target and rename, like ingest.py's columnar files.
+    target = shm_path(name)
+    tmp = target + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, target)
+    return os.path.getsize(target)
+
+
+# Publishes the district dimension and `names` (default: every dataset) unless
+# the published copy is current; returns {name: bytes} of what was written.
+def publish(names=None):
+    targets = {"districts": (_districts_key(), lambda: _districts(_district_sources()))}
+    for name in names or SCHEMAS:
+        targets[name] = (_shm_key(name), lambda name=name: _load(name))
+    return {name: _publish(name, frame(), key) for name, (key, frame) in targets.items() if _published_key(name) != key}
@@ -0,0 +1,77 @@
+# dims.py
+# Canonical state/district dimensions. The datasets spell the same place in
+# different ways ("andaman-&-nicobar-islands" vs "andaman & nicobar islands",
+# "bengaluru urban district" vs "bengaluru urban"); every spelling is mapped to
+# one compact integer id, and display labels are computed once per dimension
+# member instead of per row.
+
+import numpy as np
+import pandas as pd
+
+# Canonical state keys; a state's id is its position in this tuple.
+STATES = (
+    "andaman & nicobar islands", "andhra pradesh", "arunachal pradesh", "assam", "bihar",
+    "chandigarh", "chhattisgarh", "dadra & nagar haveli & daman & diu", "delhi", "goa",
+    "gujarat", "haryana", "himachal pradesh", "jammu & kashmir", "jharkhand", "karnataka",
+    "kerala", "ladakh", "lakshadweep", "madhya pradesh", "maharashtra", "manipur",
+    "meghalaya", "mizoram", "nagaland", "odisha", "puducherry", "punjab", "rajasthan",
+    "sikkim", "tamil nadu", "telangana", "tripura", "uttar pradesh", "uttarakhand",
+    "west bengal",
+)
+STATE_LABELS = np.array([state.title().replace(" And ", " and ") for state in STATES], dtype=object)
+
+# Display order for state pickers (alphabetical by label).
+STATE_IDS = tuple(int(i) for i in np.argsort(STATE_LABELS, kind="stable"))
+
+
+# ------------------ Name normalization ------------------
+def normalize_state(names):
+    names = pd.Series(names, dtype="str")
+    return names.str.lower().str.replace("-", " ", regex=False).str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def normalize_district(names):
+    return normalize_state(names).str.replace(r" district$", "", regex=True)
+
+
+# ------------------ States ------------------
+def state_ids(names):
+    # Vectorized lookup: categorical codes against the canonical tuple are the ids.
+    codes = pd.Categorical(normalize_state(names), categories=STATES).codes
+    if (codes < 0).any():
+        unknown = sorted(set(pd.Series(names)[codes < 0]))
+        raise ValueError(f"unknown state names: {unknown}")
+    return codes.astype(np.int8)
+
+
+def state_id(name):
+    return int(state_ids([name])[0])
+
+
+def state_label(state_id):
+    return STATE_LABELS[state_id]
+
+
+def state_labels(ids):
+    return STATE_LABELS[np.asarray(ids)]
+
+
+# ------------------ Districts ------------------
+# The district dimension is built from every dataset that has a district column:
+# one row per (state_id, normalized district), with its label precomputed.
+def build_districts(frames):
+    keys = pd.concat(
+        [pd.DataFrame({"state_id": state_ids(df["state"]), "district": normalize_district(df["district"])}) for df in frames],
+        ignore_index=True,
+    ).drop_duplicates().sort_values(["state_id", "district"], ignore_index=True)
+    label = keys["district"].str.title().str.replace(" And ", " and ", regex=False)
+    return keys.assign(
+        label=label,
+        label_with_state=label + " (" + state_labels(keys["state_id"]) + ")",
+    )
+
+
+def district_ids(districts, state_ids, names):
+    index = pd.MultiIndex.from_frame(districts[["state_id", "district"]])
+    ids = index.get_indexer(pd.MultiIndex.from_arrays([np.asarray(state_ids), normalize_district(names)]))
+    return ids.astype(np.int32)
@@ -0,0 +1,188 @@
+# export.py
+# Static snapshot of the dashboard's default view. Every case study is run
+# headless (Streamlit AppTest) at its default widget values, one page per
+# worker process, and written out as a self-contained bundle: one HTML file per
+# page with charts as pre-encoded PNGs (or Plotly JSON drawn by a bundled
+# plotly.js with --renderer plotly), markdown as HTML and widgets as their
+# default values. Serve it from any static file server; --live-url links each
+# page to the live app for interactive filtering.
+#
+#   python export.py                                   # -> snapshot/
+#   python export.py --out site --renderer plotly --live-url https://dashboard.example.com
+
+import argparse
+import html
+import os
+import re
+import shutil
+import sys
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+STYLE = """
+body { font-family: system-ui, sans-serif; margin: 0 auto; max-width: 1400px; padding: 1rem 2rem; color: #262730; }
+nav a { margin-right: 1.5rem; }
+.row { display: flex; gap: 2rem; }
+.col { flex: 1; min-width: 0; }
+img { max-width: 100%; }
+.widget { background: #f0f2f6; border-radius: 0.5rem; padding: 0.4rem 0.8rem; }
+.plotly { width: 100%; }
+ul { margin: 0.2rem 0; }
+"""
+
+
+# ------------------ Markdown (the subset the case studies use) ------------------
+def _inline(text):
+    return re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(text, quote=False))
+
+
+def markdown(text):
+    out = []
+    for line in textwrap.dedent(text).strip().splitlines():
+        stripped = line.strip()
+        heading = re.match(r"(#{1,6})\s+(.*)", stripped)
+        item = re.match(r"(\s*)- (.*)", line)
+        if stripped == "---":
+            out.append("<hr>")
+        elif heading:
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif item:
+            out.append(f'<ul style="margin-left: {len(item.group(1)) // 2 * 1.5}em"><li>{_inline(item.group(2))}</li></ul>')
+        elif stripped:
+            out.append(f"<p>{_inline(stripped)}</p>")
+    return "\n".join(out)
+
+
+# ------------------ Worker: one page ------------------
+def _widget(node):
+    # Default value(s) as the user sees them (after format_func).
+    options = list(node.options)
+    if hasattr(node, "indices"):
+        shown = ", ".join(options[i] for i in node.indices)
+    elif hasattr(node, "index"):
+        shown = options[node.index] if node.index is not None else ""
+    else:  # select_slider: default holds option positions
+        shown = " – ".join(options[int(i)] for i in node.proto.default)
+    return f'<p class="widget">{html.escape(node.label)} <strong>{html.escape(shown)}</strong></p>'
+
+
+# `page` carries the captured images (in render order), the files written so far,
+# a chart counter used for element ids and whether plotly.js is needed.
+def _to_html(node, page):
+    kind = getattr(node, "type", "")
+    if kind in ("header", "subheader", "title"):
+        level = {"title": 1, "header": 2, "subheader": 3}[kind]
+        return f"<h{level}>{_inline(node.value)}</h{level}>"
+    if kind == "markdown":
+        return markdown(node.value)
+    if kind == "image":
+        chart, fmt, image = next(page["images"])
+        name = f"charts/{chart}.{fmt}"
+        page["files"][name] = image
+        page["charts"] += 1
+        return f'<img src="{name}" alt="{html.escape(chart)}">'
+    if kind == "plotly_chart":
+        spec = node.proto.spec.replace("</", "<\\/")  # stays inside the <script> element
+        page["charts"] += 1
+        page["plotly"] = True
+        div = f"chart-{page['charts']}"
+        return f'<div class="plotly" id="{div}"></div><script>(function(){{var f={spec};Plotly.newPlot("{div}",f.data,f.layout,{{responsive:true}});}})();</script>'
+    if kind in ("radio", "selectbox", "multiselect", "select_slider"):
+        return _widget(node)
+    children = [_to_html(child, page) for child in getattr(node, "children", {}).values()]
+    if kind == "flex_container":
+        return '<div class="row">' + "".join(children) + "</div>"
+    if kind == "column":
+        return '<div class="col">' + "\n".join(children) + "</div>"
+    return "\n".join(children)
+
+
+def render(module_name, renderer):
+    import warnings
+    # Only what AppTest itself raises about running without a server; warnings
+    # from the pages (pandas, Streamlit API deprecations) still reach the log.
+    for category in (UserWarning, DeprecationWarning):
+        warnings.filterwarnings("ignore", category=category, module=r"streamlit\.testing")
+
+    from streamlit.testing.v1 import AppTest
+
+    import charts
+    import pages
+
+    at = AppTest.from_string(pages.script(module_name), default_timeout=600)
+    at.session_state["renderer"] = renderer
+    try:
+        with charts.capture() as captured:
+            at.run()
+    finally:
+        charts.shutdown()
+    if at.exception:
+        raise RuntimeError(f"{module_name}: {at.exception[0].value}")
+    page = {"images": iter(captured), "files": {}, "charts": 0, "plotly": False}
+    body = _to_html(at.main, page)
+    return body, page["files"], page["charts"], page["plotly"]
+
+
+# ------------------ Bundle ------------------
+def _page(title, nav, body, live_url, url_path, plotly):
+    live = f'<p><a href="{html.escape(live_url.rstrip("/"))}/{url_path}">🔎 Open the interactive view</a></p>' if live_url else ""
+    script = '<script src="plotly.min.js"></script>' if plotly else ""
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>{STYLE}</style>
+{script}
+</head>
+<body>
+<h1>📱 PhonePe Data Analysis – Business Case Studies</h1>
+<nav>{nav}</nav>
+{live}
+{body}
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="snapshot")
+    parser.add_argument("--renderer", choices=["matplotlib", "plotly"], default="matplotlib")
+    parser.add_argument("--live-url", help="base URL of the live app, linked from every page")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from pages import PAGES
+
+    os.makedirs(os.path.join(args.out, "charts"), exist_ok=True)
+    needs_plotly = False
+    nav = "".join(f'<a href="{url_path}.html">{icon} {html.escape(title)}</a>' for _, title, icon, url_path in PAGES)
+    # One page per process: AppTest takes over __main__ while a page runs, so a
+    # worker is not reused for a second page.
+    with ProcessPoolExecutor(max_workers=args.jobs, max_tasks_per_child=1) as pool:
+        results = pool.map(render, [module.__name__ for module, *_ in PAGES], [args.renderer] * len(PAGES))
+        for (module, title, icon, url_path), (body, files, count, plotly) in zip(PAGES, results):
+            for name, data in files.items():
+                with open(os.path.join(args.out, name), "wb") as f:
+                    f.write(data)
+            with open(os.path.join(args.out, f"{url_path}.html"), "w", encoding="utf-8") as f:
+                f.write(_page(title, nav, body, args.live_url, url_path, plotly))
+            needs_plotly |= plotly
+            print(f"✓ {url_path}.html ({count} charts)")
+
+    default = PAGES[0][3]
+    with open(os.path.join(args.out, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f'<!DOCTYPE html><meta http-equiv="refresh" content="0; url={default}.html">\n')
+    if needs_plotly:
+        import plotly
+        shutil.copy(os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js"), args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
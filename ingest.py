@@ -0,0 +1,221 @@
+# ingest.py
+# One-time ingestion step: validate each CSV against data.SCHEMAS and convert it
+# into a typed, uncompressed Feather (Arrow IPC) file that data.load() can
+# memory-map with column projection instead of re-parsing quoted strings.
+#
+#   python ingest.py                          # every dataset
+#   python ingest.py quarterly_registrations  # selected datasets
+#
+# New quarters are appended without touching history:
+#
+#   python ingest.py append quarterly_registrations 2025_q1.csv
+#
+# writes one partition file per (year, quarter) in the new file. The running app
+# notices the new partition on its next rerun (it is part of data.version), so
+# only the views and charts built from that dataset are recomputed.
+#
+# A fact file too large to load whole (e.g. pincode x quarter x category rows)
+# is streamed in chunks into the dataset's own grain (see stream.py) and stored
+# as its base file, replacing what was ingested from the dataset's CSV:
+#
+#   python ingest.py stream quarterly_state_transaction transactions_full.csv
+#
+# The optional SQL backend (see query.py) is built from the loaded datasets:
+#
+#   python ingest.py db [sqlite|duckdb]
+#
+# Shared-memory mode (see data.py): publish every loaded dataset to /dev/shm
+# for app processes started with PHONEPE_SHM=1, and with --watch keep
+# re-publishing the ones whose sources change:
+#
+#   python ingest.py shm [--watch SECONDS]
+#
+# The pincode -> district -> state lookup (see pincodes.py) is built from the
+# datasets, plus districts from an optional postal directory CSV:
+#
+#   python ingest.py pincodes [directory.csv]
+
+import os
+import sys
+import time
+
+import pyarrow.feather as feather
+
+import data
+import dims
+import pincodes
+import query
+import stream as streaming
+
+
+def validate(name, df):
+    schema = data.SCHEMAS[name]
+    problems = []
+    for column, dtype in schema.items():
+        # Only the nullable extension dtypes ("Int64") may hold missing values.
+        if dtype != "Int64" and df[column].isna().any():
+            problems.append(f"{column}: {int(df[column].isna().sum())} missing values")
+        if dtype in ("int64", "float64", "Int64") and (df[column] < 0).any():
+            problems.append(f"{column}: negative values")
+    if "quarter" in df and not df["quarter"].between(1, 4).all():
+        problems.append("quarter: values outside 1-4")
+    # Every row has to map onto the dimensions, or each later data.load() of the
+    # dataset would fail on it.
+    if "state" in df:
+        try:
+            dims.state_ids(df["state"])
+        except ValueError as e:
+            problems.append(f"state: {e}")
+    if "district" in df and (dims.normalize_district(df["district"]) == "").any():
+        problems.append("district: blank names")
+    if problems:
+        raise ValueError(f"{name}: " + "; ".join(problems))
+
+
+def to_columnar(df):
+    return df.astype({column: "category" for column in data.CATEGORICAL if column in df})
+
+
+def _write(df, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write next to the target and rename, so a running app never maps a half-written file.
+    tmp = target + ".tmp"
+    feather.write_feather(to_columnar(df), tmp, compression="uncompressed")
+    os.replace(tmp, target)
+
+
+def ingest(name):
+    try:
+        df = data.read_csv(name)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from e
+    validate(name, df)
+
+    target = data.columnar_path(name)
+    _write(df, target)
+    return len(df), os.path.getsize(data.path(name)), os.path.getsize(target)
+
+
+def append(name, file):
+    schema = data.SCHEMAS[name]
+    if not {"year", "quarter"} <= set(schema):
+        raise ValueError(f"{name}: not partitioned by year/quarter")
+    try:
+        df = data.read_csv(name, file=file)
+    except ValueError as e:
+        raise ValueError(f"{file}: {e}") from e
+    validate(name, df)
+
+    # Append-only: a quarter that is already stored has to be fixed in place, not re-appended.
+    stored = data.load(name, columns=["year", "quarter"]).drop_duplicates()
+    periods = df[["year", "quarter"]].drop_duplicates()
+    clash = periods.merge(stored)
+    if len(clash):
+        raise ValueError(f"{name}: already has " + ", ".join(f"{y} Q{q}" for y, q in clash.itertuples(index=False)))
+
+    for (year, quarter), partition in df.groupby(["year", "quarter"], sort=True):
+        _write(partition.reset_index(drop=True), data.partition_path(name, year, quarter))
+    return len(df), len(periods)
+
+
+def stream(name, file):
+    rows, df = streaming.fact(name, file)
+    validate(name, df)
+
+    # Appended quarters are kept, so the streamed file may not repeat them.
+    if "year" in df:
+        appended = {os.path.basename(part)[:-len(".feather")] for part, _ in data.parts(name)[1:]}
+        clash = sorted(appended & {f"{y}Q{q}" for y, q in df[["year", "quarter"]].drop_duplicates().itertuples(index=False)})
+        if clash:
+            raise ValueError(f"{name}: already has appended " + ", ".join(period.replace("Q", " Q") for period in clash))
+
+    target = data.columnar_path(name)
+    _write(df, target)
+    return rows, len(df)
+
+
+def main(names):
+    if names[:1] == ["db"]:
+        engine = names[1] if len(names) > 1 else "sqlite"
+        try:
+            rows = query.build(engine)
+        except (ValueError, ImportError) as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 1
+        print(f"✓ {query.path(engine)}: {len(rows)} tables, {sum(rows.values()):,} rows")
+        return 0
+
+    if names[:1] == ["pincodes"]:
+        if len(names) > 2:
+            print("usage: python ingest.py pincodes [directory.csv]", file=sys.stderr)
+            return 2
+        try:
+            rows, with_district = pincodes.build(names[1] if len(names) > 1 else None)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 1
+        print(f"✓ {pincodes.path()}: {rows:,} pincodes, {with_district:,} with a district")
+        return 0
+
+    if names[:1] == ["shm"]:
+        if len(names) not in (1, 3) or names[1:2] not in ([], ["--watch"]):
+            print("usage: python ingest.py shm [--watch SECONDS]", file=sys.stderr)
+            return 2
+        interval = float(names[2]) if len(names) == 3 else None
+        while True:
+            for name, size in data.publish().items():
+                print(f"✓ {data.shm_path(name)}: {size:,} bytes", flush=True)
+            if interval is None:
+                return 0
+            time.sleep(interval)
+
+    if names[:1] == ["stream"]:
+        if len(names) != 3:
+            print("usage: python ingest.py stream <dataset> <file.csv>", file=sys.stderr)
+            return 2
+        _, name, file = names
+        try:
+            rows, stored = stream(name, file)
+        except KeyError:
+            print(f"✗ {name}: unknown dataset", file=sys.stderr)
+            return 1
+        except (ValueError, FileNotFoundError) as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 1
+        print(f"✓ {name}: streamed {rows:,} rows into {stored:,}")
+        return 0
+
+    if names[:1] == ["append"]:
+        if len(names) != 3:
+            print("usage: python ingest.py append <dataset> <file.csv>", file=sys.stderr)
+            return 2
+        _, name, file = names
+        try:
+            rows, quarters = append(name, file)
+        except KeyError:
+            print(f"✗ {name}: unknown dataset", file=sys.stderr)
+            return 1
+        except ValueError as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 1
+        print(f"✓ {name}: appended {rows:,} rows in {quarters} quarter(s)")
+        return 0
+
+    failed = False
+    for name in names or data.SCHEMAS:
+        try:
+            rows, csv_bytes, columnar_bytes = ingest(name)
+        except KeyError:
+            print(f"✗ {name}: unknown dataset", file=sys.stderr)
+            failed = True
+            continue
+        except ValueError as e:
+            print(f"✗ {e}", file=sys.stderr)
+            failed = True
+            continue
+        print(f"✓ {name}: {rows:,} rows, {csv_bytes:,} → {columnar_bytes:,} bytes")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
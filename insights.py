@@ -0,0 +1,50 @@
+# insights.py
+# Insight panels: a heading plus one "**label**: value" line per ranked row,
+# sent to the client as a single markdown element instead of one element per
+# row. Values are formatted column-wise with pandas string operations rather
+# than an f-string per row; amounts use the Indian grouping (₹1,23,45,678) and
+# rates are signed percentages.
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# A comma before every group of three digits / before the last three and then
+# every two digits (lakh, crore), counted from the right.
+_THOUSANDS = r"(\d)(?=(\d{3})+$)"
+_LAKHS = r"(\d)(?=(\d{2})+$)"
+
+
+def _digits(values):
+    # Whole units, truncated like int(); the sign is kept apart from the digits.
+    values = np.trunc(np.asarray(values, dtype=np.float64)).astype(np.int64)
+    sign = pd.Series(np.where(values < 0, "-", ""))
+    return sign, pd.Series(np.abs(values)).astype(str)
+
+
+# 1234567 -> "1,234,567"
+def counts(values):
+    sign, digits = _digits(values)
+    return sign + digits.str.replace(_THOUSANDS, r"\1,", regex=True)
+
+
+# 1234567 -> "₹12,34,567"
+def rupees(values):
+    sign, digits = _digits(values)
+    head = digits.str[:-3].str.replace(_LAKHS, r"\1,", regex=True)
+    return sign + "₹" + (head + ",").where(head != "", "") + digits.str[-3:]
+
+
+# 0.1234 -> "+12.3%"; missing rates -> "–"
+def percents(values):
+    values = np.round(np.asarray(values, dtype=np.float64) * 100, 1)
+    sign = pd.Series(np.where(values < 0, "-", "+"))
+    text = sign + pd.Series(np.abs(values)).astype(str) + "%"
+    return text.where(~np.isnan(values), "–")
+
+
+# `labels` and `values` are parallel columns (e.g. of a rankings.top frame).
+def panel(title, labels, values, currency=False, percent=False):
+    formatted = percents(values) if percent else rupees(values) if currency else counts(values)
+    lines = "**" + pd.Series(np.asarray(labels, dtype=object), dtype=str) + "**: " + formatted
+    st.markdown("\n\n".join([f"### {title}", *lines]))
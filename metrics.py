@@ -0,0 +1,138 @@
+# metrics.py
+# Lightweight instrumentation. Two layers share one lock:
+#   - phase totals and counters for the benchmark harness (bench_run.py), which
+#     reads and resets them between runs;
+#   - per-chart histograms (render time, rows consumed, bytes sent) exported in
+#     Prometheus text format. Set PHONEPE_METRICS_FILE to have the app rewrite
+#     that file at most every PHONEPE_METRICS_INTERVAL seconds (default 15), e.g.
+#     for node_exporter's textfile collector.
+
+import atexit
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+PHASES = ("parse", "draw", "encode")
+
+METRICS_FILE = os.environ.get("PHONEPE_METRICS_FILE")
+DUMP_INTERVAL = float(os.environ.get("PHONEPE_METRICS_INTERVAL", "15"))
+
+# Histogram name -> (help text, bucket upper bounds).
+HISTOGRAMS = {
+    "phonepe_chart_render_seconds": (
+        "Wall time to render one chart, including cache lookup and encoding.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    "phonepe_chart_rows": (
+        "Rows of input data consumed by one chart render.",
+        (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+    ),
+    "phonepe_chart_bytes": (
+        "Bytes sent to the client for one chart render.",
+        (4_096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216),
+    ),
+}
+
+_totals = defaultdict(float)
+_counters = defaultdict(int)
+_histograms = {}
+_last_dump = 0.0
+_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _totals[name] += elapsed
+
+
+def count(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot(reset=False):
+    with _lock:
+        result = {"seconds": dict(_totals), "counters": dict(_counters)}
+        if reset:
+            _totals.clear()
+            _counters.clear()
+    return result
+
+
+# ------------------ Histograms ------------------
+def observe(name, value, **labels):
+    _, bounds = HISTOGRAMS[name]
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            # Per-bucket (non-cumulative) counts, the last one for +Inf; then sum, count.
+            histogram = _histograms[key] = [[0] * (len(bounds) + 1), 0.0, 0]
+        histogram[0][bisect_left(bounds, value)] += 1
+        histogram[1] += value
+        histogram[2] += 1
+    _maybe_dump()
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def prometheus_text():
+    with _lock:
+        series = sorted((key, [list(h[0]), h[1], h[2]]) for key, h in _histograms.items())
+    lines = []
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        matching = [(labels, h) for (n, labels), h in series if n == name]
+        if not matching:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, (buckets, total, count) in matching:
+            cumulative = 0
+            for bound, n in zip(bounds + (math.inf,), buckets):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                lines.append(f"{name}_bucket{_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total!r}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def dump(path=None):
+    path = path or METRICS_FILE
+    # Write next to the target and rename, so a scraper never reads a half-written file.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+def _maybe_dump():
+    global _last_dump
+    if not METRICS_FILE:
+        return
+    now = time.monotonic()
+    with _lock:
+        if now - _last_dump < DUMP_INTERVAL:
+            return
+        _last_dump = now
+    dump()
+
+
+if METRICS_FILE:
+    atexit.register(dump)
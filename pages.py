@@ -0,0 +1,22 @@
+# pages.py
+# The dashboard's pages, shared by app.py (live navigation) and export.py
+# (static snapshot): (module, title, icon, url_path), default page first.
+import case_study_1
+import case_study_2
+import case_study_3
+import case_study_4
+import case_study_5
+
+PAGES = [
+    (case_study_1, "Case Study 1: Decoding Transaction Dynamics on PhonePe", "📊", "transactions"),
+    (case_study_2, "Case Study 2: Device Dominance and User Engagement Analysis", "🏢", "devices"),
+    (case_study_3, "Case Study 3: Insurance Engagement Analysis", "📍", "insurance"),
+    (case_study_4, "Case Study 4: User Engagement and Growth Strategy", "💳", "engagement"),
+    (case_study_5, "Case Study 5: Insurance Transactions Analysis", "📈", "registrations"),
+]
+
+
+# Script that runs one page headless under AppTest (export.py, bench_run.py,
+# bench_leaks.py); guarded like app.py, see charts.PRELOAD.
+def script(module_name):
+    return f"if __name__ == '__main__':\n    import {module_name}\n    {module_name}.run()\n"
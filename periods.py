@@ -0,0 +1,66 @@
+# periods.py
+# Period-indexed access to the quarterly datasets. A period is one integer,
+# year * 4 + quarter - 1, so periods sort and compare as numbers. Each dataset
+# is sorted by period once per data version; a year/quarter range is then two
+# binary searches and a row slice, and the "2018 Q1" labels are built once per
+# distinct period instead of per row on every rerun.
+
+from collections import namedtuple
+
+import numpy as np
+import streamlit as st
+
+import data
+
+# Base datasets with year/quarter columns.
+QUARTERLY = tuple(name for name, schema in data.SCHEMAS.items() if {"year", "quarter"} <= set(schema))
+
+# `frame` sorted by period (with `period` and `year_quarter` columns) and its
+# period column as a plain array for np.searchsorted.
+Store = namedtuple("Store", ["frame", "periods"])
+
+
+def period(year, quarter):
+    return year * 4 + quarter - 1
+
+
+def label(period):
+    year, quarter = divmod(int(period), 4)
+    return f"{year} Q{quarter + 1}"
+
+
+@st.cache_resource(show_spinner=False, max_entries=4 * len(QUARTERLY))
+def _store(name, version, columns):
+    df = data.load(name, columns=list(columns) if columns else None)
+    keys = period(df["year"].to_numpy(np.int32), df["quarter"].to_numpy(np.int32))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    distinct, codes = np.unique(keys, return_inverse=True)
+    labels = np.array([label(p) for p in distinct], dtype=object)
+    frame = df.take(order).reset_index(drop=True).assign(period=keys, year_quarter=labels[codes])
+    return Store(frame, keys)
+
+
+def store(name, columns=None):
+    return _store(name, data.version(name), tuple(columns) if columns else None)
+
+
+# Distinct periods present in `name`, ascending.
+def available(name):
+    return np.unique(store(name, ["year", "quarter"]).periods).tolist()
+
+
+# Rows of `name` from period `start` to `end` inclusive.
+def select(name, start=None, end=None, columns=None):
+    s = store(name, columns)
+    lo = 0 if start is None else np.searchsorted(s.periods, start, side="left")
+    hi = len(s.periods) if end is None else np.searchsorted(s.periods, end, side="right")
+    return s.frame.iloc[lo:hi]
+
+
+# Year/quarter range picker over `name`'s periods; returns (start, end) periods.
+def range_slider(name, label_text="📅 Quarter range:"):
+    options = available(name)
+    if len(options) < 2:
+        return options[0], options[-1]
+    return st.select_slider(label_text, options=options, value=(options[0], options[-1]), format_func=label)
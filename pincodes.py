@@ -0,0 +1,159 @@
+# pincodes.py
+# Pincode -> district -> state hierarchy for the pincode datasets. A local
+# lookup file (pincodes.csv next to the datasets, written by
+# `python ingest.py pincodes`) maps each pincode to its state and, where a
+# postal directory supplied one, its district. Each pincode dataset is joined
+# against it once per data version, so every row carries integer state and
+# district ids; a rollup to any level, or a drill-down into one state, district
+# or period, is then a mask and a groupby over those ids, e.g.
+#
+#   rollup("pincode_registrations", "registered_users", "state_id")
+#   rollup("top_insurance_pincode", "amount", "pincode", 10, state_id=15, year=2023, quarter=2)
+#
+# Rows whose pincode the lookup does not place are left out of the district
+# and state rollups (id -1), but not out of the pincode level.
+#
+# The datasets only pair pincodes with states, so the shipped pincodes.csv has
+# no districts and the district level stays empty until the lookup is rebuilt
+# with a postal directory (`python ingest.py pincodes <directory.csv>`).
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data
+import dims
+
+# Hierarchy levels, coarsest first.
+LEVELS = ("state_id", "district_id", "pincode")
+
+# Pincode datasets -> their additive metrics.
+DATASETS = {
+    "pincode_registrations": ("registered_users",),
+    "top_insurance_pincode": ("count", "amount"),
+}
+
+
+def path():
+    return os.path.join(data.DATA_DIR, "pincodes.csv")
+
+
+def available():
+    return os.path.exists(path())
+
+
+# ------------------ Lookup file ------------------
+def _state_ids(names):
+    # Postal directories spell "&" as "and" and use older state names; those rows are skipped (-1).
+    names = dims.normalize_state(names).str.replace(" and ", " & ", regex=False)
+    return pd.Categorical(names, categories=dims.STATES).codes.astype(np.int8)
+
+
+def _pincodes(values):
+    # Pincodes as int64; "unknown" and other non-numeric values become -1.
+    return pd.to_numeric(pd.Series(values, dtype="str"), errors="coerce").fillna(-1).astype(np.int64).to_numpy()
+
+
+def _column(df, *names):
+    columns = {column.lower(): column for column in df.columns}
+    found = next((columns[name] for name in names if name in columns), None)
+    if found is None:
+        raise ValueError(f"no {' / '.join(names)} column")
+    return df[found]
+
+
+# Pincode -> state pairs come from top_insurance_pincode, the one pincode dataset
+# that has a state. `directory` is an optional postal directory CSV (e.g. the
+# All India Pincode Directory: pincode, districtname, statename, one row per
+# post office) that adds districts and the pincodes the datasets do not place.
+def build(directory=None):
+    known = data.load("top_insurance_pincode", ["state", "pincode"])
+    lookup = pd.DataFrame({"pincode": _pincodes(known["pincode"]), "state_id": known["state_id"].to_numpy(), "district": ""})
+    if directory is not None:
+        df = pd.read_csv(directory, dtype="str", keep_default_na=False)
+        try:
+            listed = pd.DataFrame({
+                "pincode": _pincodes(_column(df, "pincode")),
+                "state_id": _state_ids(_column(df, "statename", "state")),
+                "district": _column(df, "districtname", "district").to_numpy(),
+            })
+        except ValueError as e:
+            raise ValueError(f"{directory}: {e}") from e
+        # The datasets' own state wins over the directory's for pincodes they both place.
+        lookup = pd.concat([lookup, listed], ignore_index=True)
+        lookup["district"] = lookup.groupby("pincode")["district"].transform("last")
+    lookup = lookup[(lookup["pincode"] >= 0) & (lookup["state_id"] >= 0)].drop_duplicates("pincode").sort_values("pincode")
+    out = pd.DataFrame({
+        "pincode": lookup["pincode"],
+        "state": np.asarray(dims.STATES, dtype=object)[lookup["state_id"].to_numpy()],
+        "district": lookup["district"],
+    })
+    # Write next to the target and rename, like ingest.py's columnar files.
+    tmp = path() + ".tmp"
+    # Quoted, CRLF-terminated, like the dataset CSVs.
+    out.to_csv(tmp, index=False, quoting=csv.QUOTE_ALL, lineterminator="\r\n")
+    os.replace(tmp, path())
+    return len(out), int((out["district"] != "").sum())
+
+
+# ------------------ Index ------------------
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _lookup(mtime, district_sources):
+    df = pd.read_csv(path(), dtype={"pincode": "int64", "state": "str", "district": "str"}, keep_default_na=False)
+    state_ids = dims.state_ids(df["state"])
+    # Unlisted or unmatched district names get -1.
+    district_ids = np.where(df["district"].to_numpy() != "", dims.district_ids(data.districts(), state_ids, df["district"]), -1)
+    return pd.DataFrame({"state_id": state_ids, "district_id": district_ids.astype(np.int32)}, index=pd.Index(df["pincode"].to_numpy()))
+
+
+def _lookup_version():
+    return data.mtime(path()), data.districts_version()
+
+
+def _version(name):
+    return data.version(name), _lookup_version()
+
+
+# Number of pincodes the lookup places in a district; 0 with the shipped lookup.
+def with_districts():
+    return int((_lookup(*_lookup_version())["district_id"] >= 0).sum())
+
+
+# `name` with int64 pincodes (-1 if not a pincode) and the state and district ids of each row.
+@st.cache_resource(show_spinner=False, max_entries=2 * len(DATASETS))
+def _indexed(name, version, lookup_version):
+    df = data.load(name)
+    lookup = _lookup(*lookup_version)
+    pincodes = _pincodes(df["pincode"])
+    at = lookup.index.get_indexer(pincodes)
+    found = at >= 0
+    state_ids = np.where(found, lookup["state_id"].to_numpy()[at], -1).astype(np.int8)
+    if "state_id" in df:
+        # A dataset's own state is authoritative; the lookup only fills rows without one.
+        state_ids = df["state_id"].to_numpy()
+    district_ids = np.where(found, lookup["district_id"].to_numpy()[at], -1).astype(np.int32)
+    return df.assign(pincode=pincodes, state_id=state_ids, district_id=district_ids)
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _rollup(name, version, lookup_version, metric, level, where):
+    df = _indexed(name, version, lookup_version)
+    keep = df[level].to_numpy() >= 0
+    for column, value in where:
+        keep &= df[column].to_numpy() == value
+    # Ties keep the level's id order.
+    sums = df[keep].groupby(level)[metric].sum().sort_values(ascending=False, kind="stable")
+    return sums.reset_index()
+
+
+# Total `metric` of dataset `name` per member of `level` (one of LEVELS), largest
+# first, over the rows matching the keyword filters (ids of a coarser level to
+# drill down, year / quarter for one period); the top `k` if given.
+def rollup(name, metric, level, k=None, **where):
+    if level not in LEVELS:
+        raise ValueError(f"unknown level {level!r}, expected one of {', '.join(LEVELS)}")
+    df = _rollup(name, *_version(name), metric, level, tuple(sorted(where.items())))
+    return df if k is None else df.head(k)
@@ -0,0 +1,91 @@
+# plots.py
+# Plotly counterparts of the chart types the case studies draw with seaborn,
+# used by the interactive renderer (see charts.renderer). Figures are drawn in
+# the browser; values are passed as numpy arrays so Plotly ships them as
+# compact base64 typed arrays rather than JSON number lists, and large line
+# charts use WebGL (Scattergl) traces.
+
+import numpy as np
+
+
+def _go():
+    import plotly.graph_objects as go  # deferred like seaborn in case_study_N.run
+
+    return go
+
+
+def _layout(fig, title, xlabel=None, ylabel=None, height=None, **layout):
+    fig.update_layout(title=title, xaxis_title=xlabel, yaxis_title=ylabel, height=height, **layout)
+    return fig
+
+
+# Bars for one or more series over the same categories. Horizontal bars list
+# the first category at the top, like seaborn's barplot.
+def bars(categories, series, title, xlabel=None, ylabel=None, horizontal=False, barmode="group", height=None):
+    go = _go()
+    categories = np.asarray(categories)
+    fig = go.Figure()
+    for name, values in series.items():
+        values = np.asarray(values)
+        if horizontal:
+            fig.add_trace(go.Bar(x=values, y=categories, name=name, orientation="h"))
+        else:
+            fig.add_trace(go.Bar(x=categories, y=values, name=name))
+    fig.update_layout(barmode=barmode, showlegend=len(series) > 1)
+    if horizontal:
+        fig.update_yaxes(autorange="reversed", type="category")
+    else:
+        fig.update_xaxes(type="category")
+    return _layout(fig, title, xlabel, ylabel, height)
+
+
+def bar(categories, values, title, xlabel=None, ylabel=None, horizontal=False, height=None):
+    return bars(categories, {ylabel or xlabel or "": values}, title, xlabel, ylabel, horizontal=horizontal, height=height)
+
+
+# Bars on the left axis and a line on the right axis over the same categories.
+def bar_line(categories, bar_values, line_values, title, bar_label, line_label):
+    go = _go()
+    categories = np.asarray(categories)
+    fig = go.Figure([
+        go.Bar(x=categories, y=np.asarray(bar_values), name=bar_label),
+        go.Scatter(x=categories, y=np.asarray(line_values), name=line_label, mode="lines+markers", yaxis="y2"),
+    ])
+    fig.update_xaxes(type="category")
+    return _layout(
+        fig, title, ylabel=bar_label,
+        yaxis2=dict(title=line_label, overlaying="y", side="right", showgrid=False),
+    )
+
+
+# One line per `hue` group of a long frame. `webgl` switches to Scattergl,
+# which stays responsive with dozens of series.
+def lines(df, x, y, hue, title, xlabel=None, ylabel=None, webgl=False, height=None):
+    go = _go()
+    trace = go.Scattergl if webgl else go.Scatter
+    fig = go.Figure([
+        trace(x=np.asarray(group[x]), y=np.asarray(group[y]), name=str(name), mode="lines+markers")
+        for name, group in df.groupby(hue, sort=False)
+    ])
+    fig.update_xaxes(type="category", categoryorder="array", categoryarray=np.sort(df[x].unique()))
+    return _layout(fig, title, xlabel, ylabel, height, legend_title=hue.replace("_", " ").title())
+
+
+# `matrix` is an aggregate.Matrix: float32 values with row/column labels.
+def heatmap(matrix, title, xlabel=None, ylabel=None, colorscale="YlGnBu", height=700):
+    go = _go()
+    fig = go.Figure(go.Heatmap(
+        z=matrix.values,
+        x=np.asarray(matrix.column_labels),
+        y=np.asarray(matrix.index_labels),
+        colorscale=colorscale,
+    ))
+    fig.update_yaxes(autorange="reversed", type="category")
+    fig.update_xaxes(type="category")
+    return _layout(fig, title, xlabel, ylabel, height)
+
+
+def pie(labels, values, title):
+    go = _go()
+    fig = go.Figure(go.Pie(labels=np.asarray(labels), values=np.asarray(values), sort=False))
+    return _layout(fig, title)
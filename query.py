@@ -0,0 +1,247 @@
+# query.py
+# Optional embedded SQL backend. `python ingest.py db` loads every dataset into
+# one file-backed database next to the columnar files, with an index on each
+# dimension key. With PHONEPE_DB=sqlite (or duckdb, if installed) filtered
+# selections and top-K lookups are answered by parameterized queries against
+# it, so a session only materializes the rows a chart shows. Without
+# PHONEPE_DB, or while the database is older than a dataset it would serve,
+# the same calls are answered from the loaded frames.
+#
+#   python ingest.py db                  # -> columnar/phonepe.sqlite
+#   python ingest.py db duckdb           # -> columnar/phonepe.duckdb
+#   PHONEPE_DB=sqlite streamlit run app.py
+
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data
+
+ENGINES = ("sqlite", "duckdb")
+ENGINE = os.environ.get("PHONEPE_DB") or None
+
+# Column groups indexed in every table that has them.
+INDEXED = (("state_id",), ("district_id",), ("year", "quarter"))
+
+# One connection per thread (Streamlit runs each session's script in its own
+# thread); each connection keeps its own cache of prepared statements.
+_local = threading.local()
+
+
+def path(engine=None):
+    return os.path.join(data.COLUMNAR_DIR, f"phonepe.{engine or ENGINE}")
+
+
+def _duckdb():
+    import duckdb  # optional: only needed with PHONEPE_DB=duckdb
+
+    return duckdb
+
+
+def _connect(engine, file, read_only=True):
+    if engine == "duckdb":
+        return _duckdb().connect(file, read_only=read_only)
+    if read_only:
+        return sqlite3.connect(f"file:{file}?mode=ro", uri=True, check_same_thread=False)
+    return sqlite3.connect(file)
+
+
+# ------------------ Build ------------------
+def _plain(df):
+    # Categoricals are stored as their values; both engines keep their own dictionaries.
+    return df.astype({column: "str" for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)})
+
+
+def build(engine="sqlite"):
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    target = path(engine)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Build next to the target and rename, like ingest.py's columnar files.
+    tmp = target + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    rows = {}
+    con = _connect(engine, tmp, read_only=False)
+    try:
+        for name in data.SCHEMAS:
+            df = _plain(data.load(name))
+            if engine == "duckdb":
+                con.register("frame", df)
+                con.execute(f'CREATE TABLE "{name}" AS SELECT * FROM frame')
+                con.unregister("frame")
+            else:
+                df.to_sql(name, con, index=False)
+            for columns in INDEXED:
+                if set(columns) <= set(df.columns):
+                    con.execute(f'CREATE INDEX "{name}_{"_".join(columns)}" ON "{name}" ({", ".join(columns)})')
+            rows[name] = len(df)
+        if engine == "sqlite":
+            con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, target)
+    return rows
+
+
+# ------------------ Queries ------------------
+# The database serves `name` only if it was built after every part of it (and,
+# for district datasets, after every district source the ids depend on).
+def available(name):
+    if ENGINE is None or name not in data.SCHEMAS:
+        return False
+    sources = [mtime for _, mtime in data.parts(name)]
+    sources += [mtime for *_, mtime in data.dims_version(name) or ()]
+    return data.mtime(path()) >= max(sources)
+
+
+def _connection(built):
+    if getattr(_local, "key", None) != (ENGINE, built):
+        # The database was rebuilt: close the handle on the replaced file, or
+        # every rebuild would keep one more open for the life of the thread.
+        if getattr(_local, "con", None) is not None:
+            _local.con.close()
+        _local.con = _connect(ENGINE, path())
+        _local.key = (ENGINE, built)
+    return _local.con
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _run(engine, built, sql, params, name):
+    con = _connection(built)
+    if engine == "duckdb":
+        df = con.execute(sql, list(params)).df()
+    else:
+        df = pd.read_sql_query(sql, con, params=params)
+    if name is not None:
+        # Rows of one dataset get its schema dtypes back (e.g. nullable Int64 ranks).
+        schema = data.SCHEMAS[name]
+        df = df.astype({column: schema[column] for column in df.columns if column in schema and column not in data.CATEGORICAL})
+    return data.compact(df)
+
+
+# `sql` with `?` placeholders; results are cached on the database's build.
+# `name` is the dataset the rows come from, if they are rows of one.
+def run(sql, params=(), name=None):
+    return _run(ENGINE, data.mtime(path()), sql, tuple(params), name)
+
+
+def _quote(identifier):
+    return f'"{identifier}"'
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _many(value):
+    return isinstance(value, (list, tuple, set, np.ndarray, pd.Series, pd.Index))
+
+
+def _where(where):
+    clauses, params = [], []
+    for column, value in sorted(where.items()):
+        if _many(value):
+            values = [_scalar(v) for v in value]
+            clauses.append(f'{_quote(column)} IN ({", ".join("?" * len(values))})' if values else "0 = 1")
+            params.extend(values)
+        else:
+            clauses.append(f"{_quote(column)} = ?")
+            params.append(_scalar(value))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _mask(df, where):
+    if not where:
+        return df
+    keep = np.ones(len(df), dtype=bool)
+    for column, value in where:
+        keep &= df[column].isin(list(value)).to_numpy() if _many(value) else (df[column] == value).to_numpy()
+    return df[keep]
+
+
+# ------------------ Frame fallbacks ------------------
+# Without the database the same calls are answered from data.load(), cached on
+# the dataset's version (and district ids) as _run is on the database's build,
+# so a rerun reuses the result instead of masking or grouping the frame again.
+def _version(name):
+    return data.version(name), data.dims_version(name)
+
+
+def _key(where):
+    # Filters as a hashable, order-independent cache key.
+    return tuple(sorted((column, tuple(map(_scalar, value)) if _many(value) else _scalar(value)) for column, value in where.items()))
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _frame_select(name, version, columns, order_by, limit, where):
+    df = _mask(data.load(name), where)
+    if order_by:
+        df = df.sort_values(order_by, ascending=False, kind="stable")
+    if limit is not None:
+        df = df.head(limit)
+    return df[list(columns)] if columns else df
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _frame_count(name, version, where):
+    return len(_mask(data.load(name), where))
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _frame_sums(name, version, by, metrics):
+    # Observed groups only, like GROUP BY.
+    return data.load(name).groupby(list(by), observed=True)[list(metrics)].sum().reset_index()
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _frame_distinct(name, version, column):
+    return np.unique(data.load(name)[column]).tolist()
+
+
+# Rows of dataset `name` matching equality (column=value) or membership
+# (column=[values]) filters, optionally the first `limit` by descending
+# `order_by` (ties keep file order), e.g.
+# select("transactions_by_state_category", state_id=20) or
+# select("pincode_registrations", order_by="registered_users", limit=10).
+def select(name, columns=None, order_by=None, limit=None, **where):
+    if available(name):
+        sql = f'SELECT {", ".join(map(_quote, columns)) if columns else "*"} FROM {_quote(name)}'
+        clause, params = _where(where)
+        sql += clause
+        # rowid is file order, as in the frames.
+        sql += f" ORDER BY {_quote(order_by)} DESC, rowid" if order_by else " ORDER BY rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return run(sql, params, name)
+    return _frame_select(name, _version(name), tuple(columns) if columns else None, order_by, limit, _key(where))
+
+
+# Number of rows of dataset `name` matching the filters of select().
+def count(name, **where):
+    if available(name):
+        clause, params = _where(where)
+        return int(run(f"SELECT COUNT(*) AS n FROM {_quote(name)}{clause}", params)["n"].iloc[0])
+    return _frame_count(name, _version(name), _key(where))
+
+
+# Sums of `metrics` per distinct value(s) of `by` in dataset `name`, ordered by `by`.
+def sums(name, by, metrics):
+    by = [by] if isinstance(by, str) else list(by)
+    if available(name):
+        keys = ", ".join(map(_quote, by))
+        totals = ", ".join(f"SUM({_quote(metric)}) AS {_quote(metric)}" for metric in metrics)
+        return run(f"SELECT {keys}, {totals} FROM {_quote(name)} GROUP BY {keys} ORDER BY {keys}", name=name)
+    return _frame_sums(name, _version(name), tuple(by), tuple(metrics))
+
+
+# Sorted distinct values of `column` in dataset `name`.
+def distinct(name, column):
+    if available(name):
+        return run(f"SELECT DISTINCT {_quote(column)} FROM {_quote(name)} ORDER BY {_quote(column)}")[column].tolist()
+    return list(_frame_distinct(name, _version(name), column))
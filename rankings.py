@@ -0,0 +1,68 @@
+# rankings.py
+# Top-K index for the ranking charts. For each (table, metric) the row order by
+# descending metric is computed once per data version with a stable argsort,
+# optionally within groups (per state, per (year, quarter) period). A top-K
+# lookup then slices the first K positions and takes those rows instead of
+# sorting the whole table on every rerun. Base datasets are ranked by the SQL
+# backend instead when one is configured (see query.py).
+
+import numpy as np
+import streamlit as st
+
+import aggregate
+import data
+import query
+
+
+def _dataset(name):
+    return (lambda: data.load(name)), (lambda: (data.version(name), data.dims_version(name)))
+
+
+def _view(view, *facts):
+    return view, (lambda: tuple((data.version(name), data.dims_version(name)) for name in facts))
+
+
+# Rankable tables: name -> (frame, version of the data it is built from).
+TABLES = {
+    "pincode_registrations": _dataset("pincode_registrations"),
+    "district_user_summary": _dataset("district_user_summary"),
+    "top_district_uers": _dataset("top_district_uers"),
+    "top_insurance_pincode": _dataset("top_insurance_pincode"),
+    "state_user_summary": _dataset("state_user_summary"),
+    "state_registrations": _view(aggregate.state_registrations, "quarterly_registrations"),
+    "district_registrations": _view(aggregate.district_registrations, "district_user_summary"),
+    "device_users_by_state": _view(aggregate.device_users_by_state, "state_users_by_device"),
+    "insurance_by_state": _view(aggregate.insurance_by_state, "insurance_trend_by_state"),
+    "insurance_by_district": _view(aggregate.insurance_by_district, "district_insurance_transactions"),
+}
+
+_EMPTY = np.array([], dtype=np.intp)
+
+
+# Positions of `table`'s rows by descending `metric` (ties keep file order), or
+# {group key: positions} when grouped by the columns in `by`.
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _ranking(table, version, metric, by):
+    df = TABLES[table][0]()
+    order = np.argsort(-np.asarray(df[metric], dtype=np.float64), kind="stable")
+    if not by:
+        return order
+    # Positions within each group come out in rank order, since `order` is ranked.
+    groups = df[list(by)].take(order).groupby(list(by) if len(by) > 1 else by[0], sort=False).indices
+    return {key: order[positions] for key, positions in groups.items()}
+
+
+# Top `k` rows of `table` by `metric` (every row in rank order if `k` is None).
+# Keyword filters select one group, e.g.
+# top("top_insurance_pincode", "amount", 10, year=2024, quarter=4) or
+# top("district_registrations", "total_registrations", 5, state_id=15).
+def top(table, metric, k, **where):
+    if query.available(table):
+        return query.select(table, order_by=metric, limit=k, **where)
+    frame, version = TABLES[table]
+    by = tuple(sorted(where))
+    index = _ranking(table, version(), metric, by)
+    if by:
+        key = where[by[0]] if len(by) == 1 else tuple(where[column] for column in by)
+        index = index.get(key, _EMPTY)
+    return frame().take(index[:k])
@@ -0,0 +1,48 @@
+# render.py
+# Encoding a matplotlib chart to PNG/SVG bytes. Kept apart from charts.py so
+# charts.parallel() workers can run it without Streamlit's render cache or
+# session state: a worker only needs this module and the page's draw function.
+
+import io
+from contextlib import contextmanager, nullcontext
+
+import metrics
+
+
+# ------------------ Figure lifecycle ------------------
+# Figures are built with matplotlib.figure.Figure rather than plt.subplots, so
+# they are never registered with pyplot's global figure manager; clearing on
+# exit breaks the artist reference cycles so memory is released right away.
+@contextmanager
+def figure(figsize):
+    from matplotlib.figure import Figure  # deferred: matplotlib loads on the first cache miss
+
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    try:
+        yield fig, ax
+    finally:
+        fig.clear()
+
+
+# A seaborn style (e.g. "whitegrid") has to be in effect while the axes are
+# created and saved, so it is applied around one chart's whole render. Pages
+# never call sns.set_style(): rcParams are process-wide, and a cached chart
+# would then look different depending on which page ran first in the process.
+def _style(style):
+    if style is None:
+        return nullcontext()
+    import seaborn as sns
+
+    return sns.axes_style(style)
+
+
+def encode(draw, figsize, fmt, args=(), style=None):
+    with _style(style), figure(figsize) as (fig, ax):
+        with metrics.phase("draw"):
+            draw(ax, *args)
+        with metrics.phase("encode"):
+            buf = io.BytesIO()
+            # Same savefig options st.pyplot uses, so cached charts look identical.
+            fig.savefig(buf, format=fmt, bbox_inches="tight", dpi=200)
+    return buf.getvalue()
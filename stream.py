@@ -0,0 +1,184 @@
+# stream.py
+# Streaming rollups for fact files too large to load whole, such as raw PhonePe
+# Pulse aggregates at pincode x quarter x category grain. The file is read as a
+# generator of fixed-size chunks, each keyed with the same state and district
+# ids as data.load(), and folded in one pass into the rollups the case studies
+# show: totals per state, per district and the quarterly series per state.
+# Memory is bounded by the chunk size plus the rollups themselves (one row per
+# state, district or state-quarter), not by the length of the file.
+#
+# `python ingest.py stream <dataset> <file.csv>` stores the rollup at the
+# dataset's grain as its base file (see fact()), so the aggregate views, period
+# stores and rankings read it like any ingested dataset. bench_stream.py checks
+# that memory stays bounded on tens of millions of rows.
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import data
+import dims
+
+CHUNK_ROWS = 1_000_000
+
+# Dimension columns a fact file may have besides its metrics.
+DIMENSIONS = ("state", "district", "year", "quarter")
+
+# `rows` read; `states` (state_id, metrics, state), `districts` (district_id,
+# metrics, state_id; the top ones if asked) and `quarterly` (state_id, year,
+# quarter, metrics) shaped like the frames in aggregate.py.
+Rollups = namedtuple("Rollups", ["rows", "states", "districts", "quarterly"])
+
+
+# ------------------ Reading ------------------
+def _keys(chunk, districts, added):
+    # Ids are looked up once per distinct spelling; rows take theirs through their category code.
+    state = chunk["state"]
+    codes = state.cat.codes.to_numpy()
+    if (codes < 0).any():
+        raise ValueError("missing state names")
+    state_ids = dims.state_ids(state.cat.categories)[codes]
+    keys = {"state_id": state_ids}
+    if "district" in chunk:
+        # District ids per distinct (state, district) pair of the chunk, not per row.
+        district = chunk["district"]
+        codes = district.cat.codes.to_numpy()
+        pairs, inverse = np.unique(state_ids.astype(np.int64) * (len(district.cat.categories) + 1) + codes + 1, return_inverse=True)
+        pair_states, pair_codes = np.divmod(pairs, len(district.cat.categories) + 1)
+        names = np.append(district.cat.categories.to_numpy(dtype=object), "")[pair_codes - 1]
+        ids = dims.district_ids(districts, pair_states, names)
+        new = np.flatnonzero(ids < 0)
+        for at, key in zip(new, zip(pair_states[new].tolist(), dims.normalize_district(names[new]).tolist())):
+            ids[at] = added.setdefault(key, len(districts) + len(added))
+        keys["district_id"] = ids[inverse]
+    return keys
+
+
+# Chunks of `file` with its dimension columns and `metrics`, keyed with
+# state_id (and district_id) in place of the state and district names. A
+# district the dimension does not have yet gets the next free id, recorded in
+# `added` as (state_id, normalized district) -> id, so none of its rows are lost.
+def read_chunks(file, metrics, chunksize=CHUNK_ROWS, added=None):
+    districts = data.districts()
+    added = {} if added is None else added
+    header = pd.read_csv(file, nrows=0).columns
+    missing = [column for column in ("state", *metrics) if column not in header]
+    if missing:
+        raise ValueError(f"{file}: missing columns {', '.join(missing)}")
+    dtype = {"state": "category", "district": "category", "year": "int16", "quarter": "int8"}
+    columns = [column for column in header if column in DIMENSIONS or column in metrics]
+    with pd.read_csv(
+        file, usecols=columns, dtype={column: dtype[column] for column in columns if column in dtype},
+        na_values=["NULL"], keep_default_na=False, chunksize=chunksize,
+    ) as reader:
+        try:
+            for chunk in reader:
+                yield chunk.drop(columns=[column for column in ("state", "district") if column in chunk]).assign(**_keys(chunk, districts, added))
+        except ValueError as e:
+            # Unparseable values or states that do not map onto the dimension.
+            raise ValueError(f"{file}: {e}") from e
+
+
+# ------------------ Rollups ------------------
+def _sums(totals, present, metrics, integer):
+    # Accumulated as float64 (exact for integers below 2**53); integer metrics are cast back.
+    df = pd.DataFrame({metric: totals[i][present] for i, metric in enumerate(metrics)})
+    return df.astype({metric: "int64" for metric in metrics if integer[metric]})
+
+
+def _grow(totals, n):
+    # Zero-pads the last axis to `n` entries, for district ids past the dimension (see read_chunks).
+    width = n - totals.shape[-1]
+    return np.pad(totals, [(0, 0)] * (totals.ndim - 1) + [(0, width)]) if width > 0 else totals
+
+
+# Folds `chunks` (e.g. read_chunks(...)) into Rollups in one pass; the district
+# rollup keeps the `top` districts by the first metric, or every district.
+def rollups(chunks, metrics, top=None):
+    metrics = list(metrics)
+    n_states, n_districts = len(dims.STATES), len(data.districts())
+    states, districts = np.zeros((len(metrics), n_states)), np.zeros((len(metrics), n_districts))
+    state_rows, district_rows = np.zeros(n_states, dtype=np.int64), np.zeros(n_districts, dtype=np.int64)
+    district_states = data.districts()["state_id"].to_numpy().copy()
+    integer = dict.fromkeys(metrics, True)
+    quarterly, rows = None, 0
+    for chunk in chunks:
+        rows += len(chunk)
+        state_ids = chunk["state_id"].to_numpy()
+        district_ids = chunk["district_id"].to_numpy() if "district_id" in chunk else None
+        state_rows += np.bincount(state_ids, minlength=n_states)
+        if district_ids is not None and len(district_ids):
+            n_districts = max(n_districts, int(district_ids.max()) + 1)
+            districts, district_rows, district_states = _grow(districts, n_districts), _grow(district_rows, n_districts), _grow(district_states, n_districts)
+            district_states[district_ids] = state_ids
+            district_rows += np.bincount(district_ids, minlength=n_districts)
+        for i, metric in enumerate(metrics):
+            integer[metric] &= chunk[metric].dtype.kind in "iu"
+            values = chunk[metric].to_numpy(np.float64, na_value=0.0)
+            states[i] += np.bincount(state_ids, weights=values, minlength=n_states)
+            if district_ids is not None:
+                districts[i] += np.bincount(district_ids, weights=values, minlength=n_districts)
+        if "year" in chunk and "quarter" in chunk:
+            partial = chunk.groupby(["state_id", "year", "quarter"], sort=False)[metrics].sum().astype(np.float64)
+            quarterly = partial if quarterly is None else quarterly.add(partial, fill_value=0)
+
+    present = state_rows > 0
+    state_ids = np.flatnonzero(present).astype(np.int8)
+    by_state = _sums(states, present, metrics, integer).assign(state=dims.state_labels(state_ids))
+    by_state.insert(0, "state_id", state_ids)
+
+    present = district_rows > 0
+    district_ids = np.flatnonzero(present).astype(np.int32)
+    by_district = _sums(districts, present, metrics, integer)
+    by_district.insert(0, "district_id", district_ids)
+    by_district = by_district.assign(state_id=district_states[district_ids])
+    if top is not None:
+        by_district = by_district.nlargest(top, metrics[0]).reset_index(drop=True)
+
+    if quarterly is not None:
+        quarterly = quarterly.sort_index().reset_index()
+        quarterly = quarterly.astype({metric: "int64" for metric in metrics if integer[metric]})
+    return Rollups(rows, by_state, by_district, quarterly)
+
+
+def rollup_file(file, metrics, top=None, chunksize=CHUNK_ROWS):
+    return rollups(read_chunks(file, metrics, chunksize), metrics, top)
+
+
+# ------------------ Base facts ------------------
+# Rollups of `file` at the grain of base dataset `name`, as a frame with its
+# schema's columns: per district if it has districts, else per state and
+# quarter if it has quarters, else per state. Every column of the schema other
+# than state/district/year/quarter is a metric summed from `file`.
+def fact(name, file, chunksize=CHUNK_ROWS):
+    schema = data.SCHEMAS[name]
+    metrics = [column for column in schema if column not in DIMENSIONS]
+    if "state" not in schema or any(schema[metric] not in ("int64", "float64") for metric in metrics):
+        raise ValueError(f"{name}: not a state, district or quarterly fact")
+    if "district" in schema:
+        header = pd.read_csv(file, nrows=0).columns
+        if "district" not in header:
+            raise ValueError(f"{file}: missing columns district")
+    added = {}
+    result = rollups(read_chunks(file, metrics, chunksize, added), metrics)
+    states = np.asarray(dims.STATES, dtype=object)
+    if "district" in schema:
+        df = result.districts
+        # Districts new to the dimension are stored under their normalized name, like the others.
+        names = np.append(data.districts()["district"].to_numpy(dtype=object), [district for _, district in added])
+        df = df.assign(district=names[df["district_id"]])
+    elif "year" in schema:
+        if result.quarterly is None:
+            raise ValueError(f"{file}: missing columns year, quarter")
+        df = result.quarterly
+    else:
+        df = result.states
+    df = df.assign(state=states[df["state_id"]])
+    # Every row of `file` is in the per-state totals, so the stored rollup has to add up to them.
+    for metric in metrics:
+        read, stored = result.states[metric].sum(), df[metric].sum()
+        matches = read == stored if schema[metric] == "int64" else np.isclose(read, stored, rtol=1e-9, atol=0)
+        if not matches:
+            raise ValueError(f"{file}: {metric} sums to {stored} after the rollup, {read} in the file")
+    return result.rows, df[list(schema)].astype({column: dtype for column, dtype in schema.items() if dtype != "str"})
@@ -0,0 +1,151 @@
+# trends.py
+# Growth and anomaly analytics over the quarterly datasets, for insight panels
+# that follow the data instead of hard-coded text. Each series is laid out once
+# per data version as a dense entity x quarter matrix (NaN where an entity has
+# no row), and every measure is computed for all entities in one pass of array
+# arithmetic over it: quarter-on-quarter and year-on-year growth, CAGR over the
+# whole span, a rolling z-score of quarterly growth against the preceding
+# quarters, and each entity's rank in every quarter.
+
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data
+import dims
+import periods
+
+# Series -> (dataset, entity column, metric).
+SERIES = {
+    "transactions": ("quarterly_state_transaction", "state_id", "total_transactions"),
+    "transaction_amount": ("quarterly_state_transaction", "state_id", "total_amount"),
+    "registrations": ("quarterly_registrations", "state_id", "total_registrations"),
+    "brand_users": ("quarterly_brand_usage_trend", "brand", "total_registered_users"),
+    "insurance": ("insurance_trend_by_state", "state_id", "total_insurance_amount"),
+}
+
+# Quarters of growth history a quarter is compared against, and the |z| from
+# which its growth counts as an anomaly.
+WINDOW = 4
+THRESHOLD = 2.5
+
+# `entities` (ids or names) x `periods` (consecutive, see periods.period)
+# matrices; `ranks` is 1 for the largest value of a quarter. `cagr` has one
+# value per entity, from its first to its last quarter with a positive value.
+Trends = namedtuple("Trends", ["entities", "periods", "values", "qoq", "yoy", "zscores", "ranks", "cagr"])
+
+
+def _change(values, lag):
+    change = np.full(values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change[:, lag:] = values[:, lag:] / values[:, :-lag] - 1
+    return np.where(np.isfinite(change), change, np.nan)
+
+
+def _zscores(growth, window):
+    zscores = np.full(growth.shape, np.nan)
+    if growth.shape[1] <= window:
+        return zscores
+    # history[:, t] holds the `window` growth values before quarter t + window.
+    history = np.lib.stride_tricks.sliding_window_view(growth, window, axis=1)[:, :-1]
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN histories
+        zscores[:, window:] = (growth[:, window:] - np.nanmean(history, axis=2)) / np.nanstd(history, axis=2)
+    return np.where(np.isfinite(zscores), zscores, np.nan)
+
+
+def _ranks(values):
+    order = np.argsort(-np.where(np.isnan(values), -np.inf, values), axis=0, kind="stable")
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, np.arange(1, len(values) + 1, dtype=np.float64)[:, None], axis=0)
+    return np.where(np.isnan(values), np.nan, ranks)
+
+
+def _cagr(values):
+    positive = values > 0
+    rows = np.arange(len(values))
+    first = positive.argmax(axis=1)
+    last = values.shape[1] - 1 - positive[:, ::-1].argmax(axis=1)
+    years = (last - first) / 4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = (values[rows, last] / values[rows, first]) ** (1 / years) - 1
+    return np.where(positive.any(axis=1) & (years > 0), cagr, np.nan)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(SERIES))
+def _trends(name, version, entity, metric):
+    source = "state" if entity == "state_id" else entity
+    frame = periods.store(name, [source, "year", "quarter", metric]).frame
+    entities, rows = np.unique(frame[entity].to_numpy(), return_inverse=True)
+    first, last = frame["period"].min(), frame["period"].max()
+    columns = frame["period"].to_numpy() - first
+    totals = np.zeros((len(entities), last - first + 1))
+    counts = np.zeros(totals.shape, dtype=np.int64)
+    np.add.at(totals, (rows, columns), frame[metric].to_numpy(np.float64))
+    np.add.at(counts, (rows, columns), 1)
+    values = np.where(counts > 0, totals, np.nan)
+    qoq = _change(values, 1)
+    return Trends(entities, np.arange(first, last + 1), values, qoq, _change(values, 4), _zscores(qoq, WINDOW), _ranks(values), _cagr(values))
+
+
+def trends(series):
+    name, entity, metric = SERIES[series]
+    return _trends(name, data.version(name), entity, metric)
+
+
+def _labels(series, entities):
+    return dims.state_labels(entities) if SERIES[series][1] == "state_id" else np.asarray(entities, dtype=object)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(SERIES))
+def _summary(series, version):
+    t = trends(series)
+    with np.errstate(invalid="ignore"):
+        # Positive when an entity climbed against the same quarter a year earlier.
+        rank_change = t.ranks[:, -5] - t.ranks[:, -1] if len(t.periods) > 4 else np.full(len(t.entities), np.nan)
+    return pd.DataFrame({
+        "entity": t.entities,
+        "label": _labels(series, t.entities),
+        "latest": t.values[:, -1],
+        "qoq": t.qoq[:, -1],
+        "yoy": t.yoy[:, -1],
+        "cagr": t.cagr,
+        "rank": t.ranks[:, -1],
+        "rank_change": rank_change,
+        "zscore": t.zscores[:, -1],
+    })
+
+
+# One row per entity for the latest quarter of `series`: its value, QoQ and
+# YoY growth, CAGR over the whole span, rank, rank change over the year and
+# z-score of its latest quarterly growth.
+def summary(series):
+    return _summary(series, data.version(SERIES[series][0]))
+
+
+def latest(series):
+    return periods.label(trends(series).periods[-1])
+
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(SERIES))
+def _anomalies(series, version, threshold):
+    t = trends(series)
+    rows, columns = np.nonzero(np.abs(np.nan_to_num(t.zscores)) >= threshold)
+    df = pd.DataFrame({
+        "entity": t.entities[rows],
+        "label": _labels(series, t.entities[rows]),
+        "period": t.periods[columns],
+        "year_quarter": [periods.label(p) for p in t.periods[columns]],
+        "qoq": t.qoq[rows, columns],
+        "zscore": t.zscores[rows, columns],
+    })
+    return df.iloc[np.argsort(-np.abs(df["zscore"].to_numpy()), kind="stable")].reset_index(drop=True)
+
+
+# Quarters whose growth is at least `threshold` standard deviations away from
+# the entity's growth over the WINDOW quarters before, most unusual first.
+def anomalies(series, threshold=THRESHOLD):
+    return _anomalies(series, data.version(SERIES[series][0]), threshold)